@@ -0,0 +1,332 @@
+# pylint: disable-msg=E0611, C0103
+""" background.py - fill histograms in background threads
+
+This file is part of lookat
+
+Copyright 2013, Nicola Chiapolini, nicola.chiapolini@physik.uzh.ch
+
+License: GNU General Public License version 2,
+         or (at your option) any later version.
+
+Each job opens its own copy of the tree, so several jobs can run next to
+each other and next to the interactive session. The thread of a job only
+reads blocks of values, with the interpreter lock released while ROOT
+reads. Filling the histogram and all callbacks (e.g. drawing) happen in
+the main thread: a ROOT timer polls the running jobs from the event loop
+of the interactive session, FillJob.wait() and poll_jobs() do the same in
+scripts. A job reads at most a few blocks ahead of the filling, then waits.
+
+Releasing the interpreter lock can only be switched on per method: once a
+job was started, TTree.Draw and TChain.Draw release it for the rest of the
+session, also for draw() in the main thread. This is harmless, unless a
+formula calls back into python code.
+
+"""
+import time
+import threading
+try:
+    from Queue import Queue, Empty, Full
+except ImportError:
+    from queue import Queue, Empty, Full
+import numpy
+from lookat.lazyroot import ROOT, release_gil
+from lookat.columnar import read_block, fill_columns
+from lookat.treeloop import tree_source, open_tree
+
+default_block_size = 100000
+default_poll_ms = 200
+default_max_blocks = 4
+_running_jobs = []
+_timer = None
+
+def _enable_thread_safety():
+    """ tell ROOT that it is used from several threads (if supported)
+
+    Also releases the interpreter lock in TTree.Draw and TChain.Draw, for
+    all later calls (see module description).
+
+    """
+    try:
+        ROOT.ROOT.EnableThreadSafety()
+    except AttributeError:
+        pass
+    release_gil(ROOT.TTree.Draw)
+    release_gil(ROOT.TChain.Draw)
+
+def poll_jobs():
+    """ fill the values read by all running jobs into their histograms
+
+    Runs periodically in the event loop of the interactive session. Call it
+    from the main thread of scripts without event loop.
+
+    """
+    for job in list(_running_jobs):
+        job.poll()
+
+def _start_timer():
+    """ call poll_jobs() regularly from the ROOT event loop """
+    global _timer
+    if _timer != None:
+        return
+    try:
+        dispatcher = ROOT.TPyDispatcher(poll_jobs)
+    except AttributeError:
+        return
+    _timer = ROOT.TTimer(default_poll_ms)
+    _timer.dispatcher = dispatcher
+    _timer.Connect("Timeout()", "TPyDispatcher", dispatcher, "Dispatch()")
+    _timer.TurnOn()
+
+class FillJob(object):
+    """ fill a histogram from a tree read in a background thread
+
+    The values read are filled into the histogram by poll(), in the main
+    thread. Until then they are kept in memory, the thread stops reading
+    when max_blocks blocks are waiting.
+
+    """
+
+    def __init__(self, hist, tree, exprs, select="", on_done=None,
+                 block_size=None, func=None, first=0, exclude=None,
+                 on_block=None, max_blocks=None):
+        """ prepare a new job, use start() to run it
+
+        Parameters
+        ----------
+        hist : TH1F or TH2F
+            histogram to fill
+        tree : TTree
+            tree to take events from, the job reads from its own copy
+        exprs : list of strings (TFormula)
+            values to fill, one for 1D, two (x, y) for 2D histograms
+        select : string
+            selection/weight to appy (default: "")
+        on_done : callable
+            called with the job once all entries are filled, in the main
+            thread (default: None)
+        block_size : int
+            number of entries read per step (default: default_block_size)
+        func : callable
+            called with the columns of each block, returns (values, weights,
+            ...) to fill into a 1D histogram. With func, select is used as
+            selection only. (default: None, fill exprs directly)
+        first : int
+            first entry to read, entries before count as already processed
+            (default: 0)
+        exclude : sorted numpy array of int
+            entries to skip, they count as already processed (default: None)
+        on_block : callable
+            called with the job after new blocks were filled, in the main
+            thread (default: None)
+        max_blocks : int
+            number of blocks read ahead of the filling
+            (default: default_max_blocks)
+
+        """
+        if block_size == None:
+            block_size = default_block_size
+        if max_blocks == None:
+            max_blocks = default_max_blocks
+        self._hist       = hist
+        self._source     = tree_source(tree)
+        if self._source == None:
+            raise ValueError("tree "+tree.GetName()+" is not stored in a file"
+                             ", it can not be reopened in the background")
+        self._exprs      = list(exprs)
+        self._select     = select
+        self._on_done    = on_done
+        self._on_block   = on_block
+        self._block_size = block_size
+        self._func       = func
+        self._first      = first
+        self._exclude    = exclude
+        self._total      = int(tree.GetEntries())
+        self._processed  = first+self._n_excluded(self._total)
+        self._error      = None
+        self._results    = Queue(max_blocks)
+        self._finished   = False
+        self._polling    = False
+        self._cancel     = threading.Event()
+        self._stopped    = threading.Event()
+        self._thread     = threading.Thread(target=self._run)
+        self._thread.daemon = True
+
+    def __repr__(self):
+        """ get informativ string representation """
+        if self._error != None:
+            status = "failed: "+str(self._error)
+        elif self.cancelled:
+            status = "cancelled"
+        elif self.done:
+            status = "done"
+        else:
+            status = "running"
+        n_bars = int(20*self.progress)
+        return "<FillJob object ({0} [{1}{2}] {3}/{4} entries, {5})>".format(
+            self._hist.GetName(), "#"*n_bars, " "*(20-n_bars),
+            self._processed, self._total, status)
+
+    @property
+    def histogram(self):
+        """ the histogram filled by this job """
+        return self._hist
+
+    @property
+    def progress(self):
+        """ fraction of entries filled into the histogram so far """
+        if self._total == 0:
+            return 1.
+        return float(self._processed)/self._total
+
+    @property
+    def done(self):
+        """ True once the job has stopped (finished, cancelled or failed) and
+        all values read are filled """
+        return self._finished
+
+    @property
+    def cancelled(self):
+        """ True if the job was cancelled """
+        return self._cancel.is_set()
+
+    @property
+    def error(self):
+        """ exception that stopped the job, None if there was none """
+        return self._error
+
+    def start(self):
+        """ start reading in the background """
+        _enable_thread_safety()
+        _running_jobs.append(self)
+        _start_timer()
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        """ stop filling after the current block """
+        self._cancel.set()
+
+    def wait(self, timeout=None):
+        """ fill the values read until the job has stopped (main thread)
+
+        Parameters
+        ----------
+        timeout : float
+            maximal time to wait in seconds (default: None, no limit)
+
+        Returns
+        -------
+        done : Boolean
+            True if the job has stopped
+
+        """
+        end = None
+        if timeout != None:
+            end = time.time()+timeout
+        while not self.poll():
+            if end != None and time.time() >= end:
+                break
+            if self._results.empty():
+                self._stopped.wait(0.05)
+        return self.done
+
+    def poll(self):
+        """ fill the values read so far into the histogram (main thread)
+
+        Calls on_block after filling new values and on_done once the job
+        has finished.
+
+        Returns
+        -------
+        done : Boolean
+            True if the job has stopped and all values are filled
+
+        """
+        if self._finished or self._polling:
+            return self._finished
+        self._polling = True
+        try:
+            # check first, so no block read before stopping is missed
+            stopped = self._stopped.is_set()
+            filled = False
+            # only the blocks already waiting, the thread keeps reading
+            for _ in range(self._results.qsize()):
+                try:
+                    columns, weights, processed = self._results.get_nowait()
+                except Empty:
+                    break
+                fill_columns([self._hist], columns, weights)
+                self._processed = processed
+                filled = True
+            if stopped:
+                self._finished = True
+                _running_jobs.remove(self)
+                if self._error == None and not self.cancelled:
+                    self._hist.BufferEmpty(1)
+                    if self._on_done != None:
+                        self._on_done(self)
+            elif filled and self._on_block != None:
+                self._on_block(self)
+        finally:
+            self._polling = False
+        return self._finished
+
+    def _n_excluded(self, end):
+        """ number of excluded entries from first up to ''end'' """
+        if self._exclude is None:
+            return 0
+        return int(numpy.searchsorted(self._exclude, end) -
+                   numpy.searchsorted(self._exclude, self._first))
+
+    def _put(self, result):
+        """ hand a block to the main thread, wait while too many are waiting
+
+        Returns
+        -------
+        added : Boolean
+            False if the job was cancelled while waiting
+
+        """
+        while not self._cancel.is_set():
+            try:
+                self._results.put(result, timeout=0.1)
+                return True
+            except Full:
+                pass
+        return False
+
+    def _run(self):
+        """ read all blocks of entries (runs in the thread) """
+        try:
+            tree = open_tree(self._source, reuse=False)
+            exprs = self._exprs
+            use_weights = self._func == None and self._select != ""
+            if use_weights:
+                exprs = exprs+[self._select]
+            if self._exclude is not None:
+                exprs = exprs+["Entry$"]
+            for first in range(self._first, self._total, self._block_size):
+                if self._cancel.is_set():
+                    return
+                n_entries = min(self._block_size, self._total-first)
+                columns = read_block(tree, exprs, self._select, first,
+                                     n_entries)
+                if self._exclude is not None:
+                    keep = ~numpy.isin(columns.pop(), self._exclude)
+                    columns = [c[keep] for c in columns]
+                if self._func != None:
+                    values, weights = self._func(columns)[:2]
+                    columns = [values]
+                else:
+                    weights = None
+                    if use_weights:
+                        weights = columns.pop()
+                end = first+n_entries
+                processed = end+self._n_excluded(self._total) - \
+                            self._n_excluded(end)
+                if not self._put((columns, weights, processed)):
+                    return
+        except Exception as err:    # pylint: disable-msg=W0703
+            self._error = err
+        finally:
+            self._stopped.set()
@@ -0,0 +1,228 @@
+# pylint: disable-msg=E0611, C0103
+""" cache.py - persistent cache for filled histograms
+
+This file is part of lookat
+
+Copyright 2013, Nicola Chiapolini, nicola.chiapolini@physik.uzh.ch
+
+License: GNU General Public License version 2,
+         or (at your option) any later version.
+
+Histograms are stored in a directory, one root file per histogram. The file
+name is a hash of everything the content depends on: identity of the input
+files, name of the tree, aliases, expression, selection and binning.
+Histograms depending on the state of the session (an entry list set on the
+tree, lookup helpers of weights.py) are not cached. When the directory
+grows beyond its size limit, the least recently used entries are removed.
+
+"""
+import os
+import glob
+import hashlib
+from lookat.lazyroot import ROOT
+from lookat.treeloop import tree_source
+
+default_directory = os.environ.get("LOOKAT_CACHE",
+                                   os.path.expanduser("~/.cache/lookat"))
+default_max_bytes = 500*1024*1024
+
+def file_identity(name):
+    """ get a string identifying the content of a file
+
+    For local files path, size and modification time are used. For remote
+    files the UUID stored in the file header is used.
+
+    Parameters
+    ----------
+    name : string
+        name (and path) of the file
+
+    Returns
+    -------
+    identity : string
+        string that changes when the file is replaced
+
+    """
+    try:
+        stat = os.stat(name)
+    except OSError:
+        the_file = ROOT.TFile.Open(name)
+        if not the_file or the_file.IsZombie():
+            raise RuntimeError("failed to open "+name)
+        identity = name+"|"+the_file.GetUUID().AsString()
+        the_file.Close()
+        return identity
+    return "|".join([os.path.abspath(name), str(stat.st_size),
+                     repr(stat.st_mtime)])
+
+def tree_identity(tree):
+    """ get a string identifying the content of a tree or chain
+
+    Parameters
+    ----------
+    tree : TTree or TChain
+        the tree to identify
+
+    Returns
+    -------
+    identity : string or None
+        tree name and identity of all files the tree is read from, None for
+        trees not stored in a file
+
+    """
+    source = tree_source(tree)
+    if source == None:
+        return None
+    name, files = source
+    return "||".join([name]+[file_identity(f) for f in files])
+
+class HistCache(object):
+    """ content-addressed store for filled histograms """
+
+    def __init__(self, directory=None, max_bytes=None):
+        """ create a cache in ''directory''
+
+        The directory is only created when the first histogram is stored.
+
+        Parameters
+        ----------
+        directory : string
+            where to store the histograms (default: default_directory)
+        max_bytes : int
+            size limit for all stored histograms (default: default_max_bytes)
+
+        """
+        if directory == None:
+            directory = default_directory
+        if max_bytes == None:
+            max_bytes = default_max_bytes
+        self._directory = directory
+        self._max_bytes = max_bytes
+
+    def __repr__(self):
+        """ get informativ string representation """
+        return "<HistCache object ("+self._directory+", "+\
+               str(len(self._entries()))+" entries)>"
+
+    @property
+    def directory(self):
+        """ directory where the histograms are stored """
+        return self._directory
+
+    def key(self, tree, var, select, h_cfg, extra=""):
+        """ create the key for a histogram
+
+        Parameters
+        ----------
+        tree : TTree or TChain
+            tree the histogram is filled from
+        var : string
+            expression filled into the histogram
+        select : string
+            selection/weight applied
+        h_cfg : string
+            histogram configuration
+        extra : string
+            any further information the content depends on
+
+        Returns
+        -------
+        key : string or None
+            hash identifying the histogram content, None if the tree can not
+            be identified (not stored in a file), has an entry list set or
+            the expressions call the lookup helpers of this session
+
+        """
+        if tree.GetEntryList() or "lookat_weight" in var+select:
+            return None
+        identity = tree_identity(tree)
+        if identity == None:
+            return None
+        aliases = tree.GetListOfAliases()
+        if aliases:
+            identity += "".join("\n"+a.GetName()+"="+a.GetTitle()
+                                for a in aliases)
+        parts = [identity, var, select, str(h_cfg), extra]
+        return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        """ get file name used for ''key'' """
+        return os.path.join(self._directory, key+".root")
+
+    def _entries(self):
+        """ get the files of all stored histograms """
+        return glob.glob(os.path.join(self._directory, "*.root"))
+
+    def get(self, key, name):
+        """ get the histogram stored for ''key''
+
+        Parameters
+        ----------
+        key : string
+            key as returned by key()
+        name : string
+            name for the returned histogram
+
+        Returns
+        -------
+        the_histo : TH1F or TH2F or None
+            copy of the stored histogram in the current directory, replacing
+            any object with the same name. None if nothing is stored for key
+
+        """
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        dir_path = ROOT.gDirectory.GetPath()
+        in_file = ROOT.TFile(path)
+        stored = in_file.Get("h")
+        ROOT.gROOT.cd(dir_path)
+        if not stored:
+            in_file.Close()
+            return None
+        existing = ROOT.gDirectory.FindObject(name)
+        if existing:
+            existing.Delete()
+        histo = stored.Clone(name)
+        histo.SetDirectory(ROOT.gDirectory)
+        in_file.Close()
+        os.utime(path, None)
+        return histo
+
+    def put(self, key, histo):
+        """ store ''histo'' for ''key''
+
+        Parameters
+        ----------
+        key : string
+            key as returned by key()
+        histo : TH1F or TH2F
+            histogram to store
+
+        """
+        if not os.path.isdir(self._directory):
+            os.makedirs(self._directory)
+        dir_path = ROOT.gDirectory.GetPath()
+        tmp_path = self._path(key)+"."+str(os.getpid())
+        out_file = ROOT.TFile(tmp_path, "recreate")
+        histo.Write("h")
+        out_file.Close()
+        ROOT.gROOT.cd(dir_path)
+        os.rename(tmp_path, self._path(key))
+        self._evict()
+
+    def _evict(self):
+        """ remove least recently used entries until the size limit is met """
+        entries = [(os.path.getmtime(p), os.path.getsize(p), p)
+                   for p in self._entries()]
+        total = sum(e[1] for e in entries)
+        for _, size, path in sorted(entries):
+            if total <= self._max_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+    def purge(self):
+        """ remove all stored histograms """
+        for path in self._entries():
+            os.remove(path)
@@ -9,10 +9,8 @@ License: GNU General Public License version 2,
          or (at your option) any later version.
 
 """
-from ROOT import TCanvas, TPad, TPaveText, TLegend
-from ROOT import TH1F, TH2F, TEfficiency, TGraph, TGraphErrors, TGraphAsymmErrors
-from ROOT import TMultiGraph
-from ROOT import kRed, kOrange, kSpring, kGreen, kCyan, kAzure, kBlue, kViolet, kMagenta
+import math
+from lookat.lazyroot import ROOT
 
 em         = 0.050
 
@@ -43,9 +41,10 @@ def _colorGenerator(i = 0, num=0):
 
     """
     if 0 < num and num < 6:
-        base_colors = [kRed, kGreen, kBlue, kCyan, kMagenta]
+        base_colors = [ROOT.kRed, ROOT.kGreen, ROOT.kBlue, ROOT.kCyan, ROOT.kMagenta]
     else:
-        base_colors = [kRed, kOrange+7, kSpring+4, kGreen, kCyan, kAzure+7, kBlue, kViolet+2, kMagenta]
+        base_colors = [ROOT.kRed, ROOT.kOrange+7, ROOT.kSpring+4, ROOT.kGreen, ROOT.kCyan,
+                       ROOT.kAzure+7, ROOT.kBlue, ROOT.kViolet+2, ROOT.kMagenta]
     N = len(base_colors)
     while True:
         yield base_colors[i%N]
@@ -55,7 +54,7 @@ def _colorGenerator(i = 0, num=0):
 def _expand_multigraphs(in_list):
     while True:
         try:
-            idx = map(type, in_list).index(TMultiGraph)
+            idx = map(type, in_list).index(ROOT.TMultiGraph)
         except ValueError:
             break
         mg = in_list.pop(idx)
@@ -63,10 +62,12 @@ def _expand_multigraphs(in_list):
             in_list.insert(idx, g)
             idx += 1
 
-_ts_default = [TH1F, TH2F, TGraph, TGraphErrors, TGraphAsymmErrors]
+def _ts_default():
+    return [ROOT.TH1F, ROOT.TH2F, ROOT.TGraph, ROOT.TGraphErrors, ROOT.TGraphAsymmErrors]
+
 class TextStrategyDefault(object):
     def __init__(self, obj):
-        if type(obj) not in _ts_default:
+        if type(obj) not in _ts_default():
             raise TypeError("bad type passed")
         self._title = obj
         self._x     = obj.GetXaxis()
@@ -98,25 +99,30 @@ class TextStrategyDefault(object):
         """ change the axis range """
         self._y.SetRangeUser(y_min, y_max)
 
-_ts_efficiency = [TEfficiency]
+def _ts_efficiency():
+    return [ROOT.TEfficiency]
+
 class TextStrategyEfficiency(TextStrategyDefault):
     def __init__(self, obj):
-        if type(obj) not in _ts_efficiency:
+        if type(obj) not in _ts_efficiency():
             raise TypeError("no TEfficiency object passed")
         self._title = obj
         self._x     = obj.GetPaintedGraph().GetXaxis()
         self._y     = obj.GetPaintedGraph().GetYaxis()
 
-_ts_multigraph = [TMultiGraph]
+def _ts_multigraph():
+    return [ROOT.TMultiGraph]
+
 class TextStrategyMultiGraph(TextStrategyDefault):
     def __init__(self, obj):
-        if type(obj) not in _ts_multigraph:
+        if type(obj) not in _ts_multigraph():
             raise TypeError("no TEfficiency object passed")
         self._title = obj.GetHistogram()
         self._x     = obj.GetXaxis()
         self._y     = obj.GetYaxis()
 
-_ts_types = _ts_default+_ts_efficiency+_ts_multigraph
+def _ts_types():
+    return _ts_default()+_ts_efficiency()+_ts_multigraph()
 
 
 class PadHandler(object):
@@ -145,7 +151,7 @@ class PadHandler(object):
         self._ylabel     = ""
         self._text_strategy = None
 
-        self._pad = TPad(name, name, dim[0], dim[1], dim[2], dim[3], 4000)
+        self._pad = ROOT.TPad(name, name, dim[0], dim[1], dim[2], dim[3], 4000)
         self._margins = {"top" : "auto", "right" : "auto", "bottom" : "auto", "left" : "auto"}
         self._update_margins()
         self._pad.Draw()
@@ -191,7 +197,7 @@ class PadHandler(object):
     @property
     def text_obj(self):
         """ get the object whose texts are displayed """
-        return self.get_primitives(_ts_types).next()
+        return self.get_primitives(_ts_types()).next()
 
     def set_text_strategy(self):
         """ set the text strategy
@@ -202,9 +208,9 @@ class PadHandler(object):
 
         """
         text_obj = self.text_obj
-        if type(text_obj) == TEfficiency:
+        if type(text_obj) == ROOT.TEfficiency:
             self._text_strategy = TextStrategyEfficiency(text_obj)
-        elif type(text_obj) == TMultiGraph:
+        elif type(text_obj) == ROOT.TMultiGraph:
             self._text_strategy = TextStrategyMultiGraph(text_obj)
         else:
             self._text_strategy = TextStrategyDefault(text_obj)
@@ -340,7 +346,7 @@ class PadHandler(object):
         self._text_strategy.set_title(self._title)
         self._pad.Update()
         try:
-            text = self.get_primitives(TPaveText).next()
+            text = self.get_primitives(ROOT.TPaveText).next()
             text.SetY1NDC( text.GetY2NDC() - (1/self._pad.GetHNDC()*em*size ) )
         except StopIteration:
             pass
@@ -438,7 +444,7 @@ class PadHandler(object):
 
         """
         if with_type == None:
-            with_type = [TH1F, TH2F]
+            with_type = [ROOT.TH1F, ROOT.TH2F]
         elif type(with_type) != list:
             with_type = [with_type]
         try:
@@ -495,9 +501,9 @@ class CanvasHandler(object):
         self._legend   = None
 
         if name != "":
-            self._canv  = TCanvas( name, name )
+            self._canv  = ROOT.TCanvas( name, name )
         else:
-            self._canv  = TCanvas()
+            self._canv  = ROOT.TCanvas()
         self.add_pad( "main" )
 
     @property
@@ -545,6 +551,40 @@ class CanvasHandler(object):
         """
         self._pads["main"].cd()
 
+    def divide(self, n_pads):
+        """ arrange ''n_pads'' pads in a grid
+
+        The main pad becomes the first (top left) pad, the others are named
+        pad_1, pad_2, ...
+
+        Parameters
+        ----------
+        n_pads : int
+            number of pads needed
+
+        Returns
+        -------
+        names : list of strings
+            names of the pads, row by row
+
+        """
+        n_cols = int(math.ceil(math.sqrt(n_pads)))
+        n_rows = int(math.ceil(float(n_pads)/n_cols))
+        names = []
+        for i in range(n_pads):
+            col, row = i % n_cols, i // n_cols
+            dim = (float(col)/n_cols, 1.-float(row+1)/n_rows,
+                   float(col+1)/n_cols, 1.-float(row)/n_rows)
+            if i == 0:
+                name = "main"
+                self._pads[name].SetPad(dim)
+            else:
+                name = "pad_"+str(i)
+                self.add_pad(name, *dim)
+            names.append(name)
+        self.cd()
+        return names
+
     def cd_ratio(self):
         """ activate ratio pad of this canvas
 
@@ -665,9 +705,9 @@ class CanvasHandler(object):
         if colors == None:
             nextColor = _colorGenerator(num=len(labels)).next
             colors = [nextColor() for _ in range(len(labels))]
-        this_legend = TLegend(pos[0], pos[1], pos[2], pos[3])
+        this_legend = ROOT.TLegend(pos[0], pos[1], pos[2], pos[3])
         this_legend.SetFillColor(0)
-        primitives = [p for p in self._pads["main"].get_primitives(_ts_types)]
+        primitives = [p for p in self._pads["main"].get_primitives(_ts_types())]
         _expand_multigraphs(primitives)
         for i, h in enumerate(primitives):
             this_legend.AddEntry(h, labels[i])
@@ -0,0 +1,255 @@
+# pylint: disable-msg=E0611, C0103
+""" catalog.py - searchable index of all branches in a tree
+
+This file is part of lookat
+
+Copyright 2013, Nicola Chiapolini, nicola.chiapolini@physik.uzh.ch
+
+License: GNU General Public License version 2,
+         or (at your option) any later version.
+
+The catalog walks the branch hierarchy once and keeps name, leaf type,
+number of entries and sizes of every branch. For chains, entries and sizes
+are summed over all files, which are opened once for this. Names are kept
+sorted, so prefix searches are a bisection; glob and fuzzy searches run on
+the names only and never touch the tree again.
+
+"""
+import bisect
+import difflib
+import fnmatch
+from lookat.lazyroot import ROOT
+
+class BranchInfo(object):
+    """ description of a single branch """
+
+    def __init__(self, name, parent, depth, leaf_type, entries, zip_bytes,
+                 tot_bytes, n_sub):
+        """ store the branch description
+
+        Parameters
+        ----------
+        name : string
+            full name of the branch
+        parent : string
+            name of the parent branch, None for top-level branches
+        depth : int
+            level in the hierarchy, 0 for top-level branches
+        leaf_type : string
+            type name of the leaves, ':'-separated if there are several
+        entries : int
+            number of entries in the branch
+        zip_bytes, tot_bytes : int
+            compressed and uncompressed size including sub-branches
+        n_sub : int
+            number of direct sub-branches
+
+        """
+        self.name      = name
+        self.parent    = parent
+        self.depth     = depth
+        self.leaf_type = leaf_type
+        self.entries   = entries
+        self.zip_bytes = zip_bytes
+        self.tot_bytes = tot_bytes
+        self.n_sub     = n_sub
+
+    def __repr__(self):
+        """ get informativ string representation """
+        return "<BranchInfo object ({0} [{1}], {2} entries, {3}/{4} bytes)>".format(
+            self.name, self.leaf_type, self.entries, self.zip_bytes,
+            self.tot_bytes)
+
+    @property
+    def compression(self):
+        """ ratio of uncompressed to compressed size """
+        if self.zip_bytes == 0:
+            return 1.
+        return float(self.tot_bytes)/self.zip_bytes
+
+class BranchCatalog(object):
+    """ all branches of a tree, with prefix, glob and fuzzy lookup """
+
+    def __init__(self, tree):
+        """ walk all branches of ''tree''
+
+        For chains, the types are taken from the tree currently loaded,
+        entries and sizes are summed over all files of the chain.
+
+        Parameters
+        ----------
+        tree : TTree or TChain
+            tree to index
+
+        """
+        self._infos = {}
+        self._order = []
+        self._add_branches(tree.GetListOfBranches(), None, 0)
+        if hasattr(tree, "GetListOfFiles"):
+            self._sum_files(tree)
+        self._sorted = sorted(self._order)
+
+    def _add_branches(self, branches, parent, depth):
+        """ add ''branches'' and (recursively) their sub-branches """
+        for branch in branches:
+            name = branch.GetName()
+            leaves = [l.GetTypeName() for l in branch.GetListOfLeaves()]
+            sub_branches = branch.GetListOfBranches()
+            self._infos[name] = BranchInfo(
+                name, parent, depth, ":".join(leaves),
+                int(branch.GetEntries()), int(branch.GetZipBytes("*")),
+                int(branch.GetTotBytes("*")), sub_branches.GetEntries())
+            self._order.append(name)
+            self._add_branches(sub_branches, name, depth+1)
+
+    def _sum_files(self, chain):
+        """ replace entries and sizes by the sums over all files of ''chain'' """
+        totals = dict((name, [0, 0, 0]) for name in self._order)
+        dir_path = ROOT.gDirectory.GetPath()
+        try:
+            for element in chain.GetListOfFiles():
+                in_file = ROOT.TFile.Open(element.GetTitle())
+                if not in_file or in_file.IsZombie():
+                    raise IOError("can not read "+element.GetTitle())
+                try:
+                    _sum_branches(in_file.Get(element.GetName()).GetListOfBranches(),
+                                  totals)
+                finally:
+                    in_file.Close()
+        finally:
+            ROOT.gROOT.cd(dir_path)
+        for name, (entries, zip_bytes, tot_bytes) in totals.items():
+            info = self._infos[name]
+            info.entries   = entries
+            info.zip_bytes = zip_bytes
+            info.tot_bytes = tot_bytes
+
+    def __repr__(self):
+        """ get informativ string representation """
+        return "<BranchCatalog object ("+str(len(self._order))+" branches)>"
+
+    def __len__(self):
+        """ number of branches, including sub-branches """
+        return len(self._order)
+
+    def __contains__(self, name):
+        """ check if ''name'' is a branch in the catalog """
+        return name in self._infos
+
+    def __getitem__(self, name):
+        """ get the BranchInfo for ''name'' """
+        return self._infos[name]
+
+    def __iter__(self):
+        """ loop over all BranchInfos in tree order """
+        for name in self._order:
+            yield self._infos[name]
+
+    def names(self, top_level=False):
+        """ get the names of all branches in tree order
+
+        Parameters
+        ----------
+        top_level : Boolean
+            return top-level branches only (default: False)
+
+        """
+        if top_level:
+            return [n for n in self._order if self._infos[n].depth == 0]
+        return list(self._order)
+
+    def children(self, name):
+        """ get the names of the direct sub-branches of ''name'' """
+        return [n for n in self._order if self._infos[n].parent == name]
+
+    def prefix(self, prefix):
+        """ get all branch names starting with ''prefix'' (sorted) """
+        first = bisect.bisect_left(self._sorted, prefix)
+        last = first
+        while last < len(self._sorted) and \
+              self._sorted[last].startswith(prefix):
+            last += 1
+        return self._sorted[first:last]
+
+    def glob(self, pattern):
+        """ get all branch names matching the shell pattern ''pattern'' """
+        return fnmatch.filter(self._sorted, pattern)
+
+    def fuzzy(self, word, n=10, cutoff=0.6):
+        """ get the branch names most similar to ''word''
+
+        Parameters
+        ----------
+        word : string
+            (misspelled) name to look for
+        n : int
+            maximal number of names returned (default: 10)
+        cutoff : float
+            minimal similarity in [0, 1] (default: 0.6)
+
+        Returns
+        -------
+        names : list of strings
+            matching names, best match first
+
+        """
+        return difflib.get_close_matches(word, self._sorted, n, cutoff)
+
+    def heaviest(self, n=20, compressed=True):
+        """ get the branches taking up most space
+
+        Only branches without sub-branches are considered, so no size is
+        counted twice.
+
+        Parameters
+        ----------
+        n : int
+            number of branches to return (default: 20)
+        compressed : Boolean
+            rank by size on disk (True, default) or in memory (False)
+
+        Returns
+        -------
+        infos : list of BranchInfo
+            largest branch first
+
+        """
+        if compressed:
+            size = lambda info: info.zip_bytes
+        else:
+            size = lambda info: info.tot_bytes
+        leaves = [info for info in self if info.n_sub == 0]
+        return sorted(leaves, key=size, reverse=True)[:n]
+
+def _sum_branches(branches, totals):
+    """ add entries and sizes of ''branches'' (recursively) to ''totals'' """
+    for branch in branches:
+        total = totals.get(branch.GetName())
+        if total != None:
+            total[0] += int(branch.GetEntries())
+            total[1] += int(branch.GetZipBytes("*"))
+            total[2] += int(branch.GetTotBytes("*"))
+        _sum_branches(branch.GetListOfBranches(), totals)
+
+def get_catalog(tree, rebuild=False):
+    """ get the catalog of ''tree'', built on first use
+
+    The catalog is stored as attribute of the tree object.
+
+    Parameters
+    ----------
+    tree : TTree or TChain
+        tree to get catalog for
+    rebuild : Boolean
+        walk the branches again, e.g. after files were added to a chain
+        (default: False)
+
+    Returns
+    -------
+    catalog : BranchCatalog
+        catalog of all branches in tree
+
+    """
+    if rebuild or getattr(tree, "branch_catalog", None) == None:
+        tree.branch_catalog = BranchCatalog(tree)
+    return tree.branch_catalog
@@ -0,0 +1,806 @@
+# pylint: disable-msg=E0611, C0103
+""" columnar.py - block-wise processing of tree columns with numpy
+
+This file is part of lookat
+
+Copyright 2013, Nicola Chiapolini, nicola.chiapolini@physik.uzh.ch
+
+License: GNU General Public License version 2,
+         or (at your option) any later version.
+
+Instead of looping over events in python, the functions in this file let
+TTree.Draw() evaluate the needed expressions for large blocks of entries and
+copy the results into numpy arrays. Bin look-ups and histogram filling are
+then done for the whole block at once.
+
+"""
+import random
+import hashlib
+import itertools
+import multiprocessing
+import numpy
+from lookat.lazyroot import ROOT
+from lookat.treeloop import tree_source, open_tree
+
+try:
+    _range = xrange
+except NameError:
+    _range = range
+
+default_block_size = 500000
+default_fill_buffer = 100000
+
+def _to_array(buf, n_rows):
+    """ copy the first ''n_rows'' values of a Double_t* buffer into numpy
+
+    Parameters
+    ----------
+    buf : Double_t* buffer
+        buffer as returned by TTree.GetVal()
+    n_rows : int
+        number of valid entries in buf
+
+    Returns
+    -------
+    values : numpy array
+        copy of the buffer content (the buffer is reused by the next Draw)
+
+    """
+    if n_rows == 0:
+        return numpy.zeros(0, dtype=numpy.float64)
+    try:
+        buf.SetSize(n_rows)     # PyROOT buffer
+    except AttributeError:
+        buf.reshape((n_rows,))  # cppyy LowLevelView
+    return numpy.array(numpy.frombuffer(buf, dtype=numpy.float64,
+                                        count=n_rows))
+
+def read_block(tree, exprs, select="", first=0, n_entries=None):
+    """ read the values of ''exprs'' for a range of entries
+
+    Uses TTree.Draw() with option "goff" to evaluate all expressions (and the
+    selection) in compiled code and copies the results into numpy arrays.
+
+    Parameters
+    ----------
+    tree : TTree
+        tree to read from
+    exprs : list of strings (TFormula)
+        expressions to evaluate, one column per expression
+    select : string
+        selection to appy (default: "")
+    first : int
+        first entry to read (default: 0)
+    n_entries : int
+        number of entries to read (default: all after first)
+
+    Returns
+    -------
+    columns : list of numpy arrays
+        one array per expression with the values of all selected entries
+
+    """
+    if n_entries == None:
+        n_entries = tree.GetEntries()-first
+    if tree.GetEstimate() <= n_entries:
+        tree.SetEstimate(n_entries+1)
+    n_rows = tree.Draw(":".join(exprs), select, "goff", n_entries, first)
+    if n_rows < 0:
+        raise RuntimeError("failed to evaluate '"+":".join(exprs)+"'")
+    if n_rows > tree.GetEstimate():
+        raise RuntimeError("more rows than entries, arrays are not supported")
+    return [_to_array(tree.GetVal(i), n_rows) for i in range(len(exprs))]
+
+def iter_blocks(tree, exprs, select="", block_size=None):
+    """ yield the values of ''exprs'' for consecutive blocks of entries
+
+    Parameters
+    ----------
+    tree : TTree
+        tree to read from
+    exprs : list of strings (TFormula)
+        expressions to evaluate, one column per expression
+    select : string
+        selection to appy (default: "")
+    block_size : int
+        number of entries processed per block (default: default_block_size)
+
+    Yields
+    ------
+    columns : list of numpy arrays
+        one array per expression with the values of the selected entries
+        in the current block
+
+    """
+    if block_size == None:
+        block_size = default_block_size
+    n_total = int(tree.GetEntries())
+    if tree.GetEntryList():
+        # entries are counted within the list
+        n_total = int(tree.GetEntryList().GetN())
+    old_estimate = tree.GetEstimate()
+    tree.SetEstimate(block_size+1)
+    try:
+        for first in range(0, n_total, block_size):
+            n_entries = min(block_size, n_total-first)
+            yield read_block(tree, exprs, select, first, n_entries)
+    finally:
+        tree.SetEstimate(old_estimate)
+
+def sample_entries(n_total, n_sample, mode="stride"):
+    """ choose a subset of entries spread over the whole tree
+
+    Parameters
+    ----------
+    n_total : int
+        number of entries in the tree
+    n_sample : int
+        number of entries to choose
+    mode : string
+        "stride" for equally spaced entries, "random" for a random subset
+        (default: "stride")
+
+    Returns
+    -------
+    entries : numpy array of int
+        sorted entry numbers
+
+    """
+    n_sample = min(n_sample, n_total)
+    if mode == "stride":
+        return numpy.unique(numpy.linspace(0, n_total-1, n_sample).astype(numpy.int64))
+    elif mode == "random":
+        # numpy.random.choice without replacement permutes all entries
+        return numpy.sort(numpy.fromiter(random.sample(_range(n_total), n_sample),
+                                         numpy.int64, n_sample))
+    raise ValueError("unknown sample mode '"+mode+"'")
+
+def read_entries(tree, exprs, select, entries):
+    """ read the values of ''exprs'' for a list of entries
+
+    Parameters
+    ----------
+    tree : TTree
+        tree to read from
+    exprs : list of strings (TFormula)
+        expressions to evaluate, one column per expression
+    select : string
+        selection to appy
+    entries : sorted list of int
+        entry numbers to read (global entry numbers for a TChain)
+
+    Returns
+    -------
+    columns : list of numpy arrays
+        one array per expression with the values of all selected entries
+
+    """
+    elist = ROOT.TEntryList()
+    elist.SetDirectory(0)
+    for entry in entries:
+        elist.Enter(int(entry), tree)
+    old_list = tree.GetEntryList()
+    tree.SetEntryList(elist)
+    try:
+        return read_block(tree, exprs, select, 0, len(entries))
+    finally:
+        tree.SetEntryList(old_list)
+
+def _process_block(task):
+    """ read one block of entries and pass the columns to a function
+
+    Runs in the worker processes started by map_blocks().
+
+    """
+    source, exprs, select, first, n_entries, func = task
+    tree = open_tree(source)
+    return func(read_block(tree, exprs, select, first, n_entries))
+
+def map_blocks(tree, exprs, select, func, block_size=None, n_workers=None):
+    """ yield ''func(columns)'' for consecutive blocks of entries
+
+    With n_workers > 1, the blocks are read and processed in a pool of
+    worker processes, each opening the files on its own. The results are
+    returned in the order of the entries, so filling them gives the same
+    histogram as the serial loop.
+
+    Parameters
+    ----------
+    tree : TTree
+        tree to read from
+    exprs : list of strings (TFormula)
+        expressions to evaluate, one column per expression
+    select : string
+        selection to appy
+    func : callable
+        called with the list of columns of each block, must be picklable
+        if n_workers > 1
+    block_size : int
+        number of entries processed per block (default: default_block_size)
+    n_workers : int
+        number of worker processes (default: None, process serially).
+        Trees not stored in a file are always processed serially.
+
+    Yields
+    ------
+    result : object
+        return value of func for the next block
+
+    """
+    source = None
+    if n_workers != None and n_workers > 1:
+        source = tree_source(tree)
+    if source == None:
+        # serially, also for trees the workers can not reopen
+        for columns in iter_blocks(tree, exprs, select, block_size):
+            yield func(columns)
+        return
+    if block_size == None:
+        block_size = default_block_size
+    n_total = int(tree.GetEntries())
+    tasks = [(source, exprs, select, first, min(block_size, n_total-first), func)
+             for first in range(0, n_total, block_size)]
+    pool = multiprocessing.Pool(n_workers)
+    try:
+        for result in pool.imap(_process_block, tasks):
+            yield result
+    finally:
+        pool.terminate()
+        pool.join()
+
+def _axis_info(axis):
+    """ get binning of a TAxis as tuple (n_bins, x_min, x_max, edges)
+
+    edges is None for axes with bins of equal width.
+
+    """
+    x_bins = axis.GetXbins()
+    edges = None
+    if x_bins.GetSize() > 0:
+        edges = numpy.array([x_bins.GetAt(i) for i in range(x_bins.GetSize())],
+                            dtype=numpy.float64)
+    return (axis.GetNbins(), axis.GetXmin(), axis.GetXmax(), edges)
+
+def find_bins(axis_info, values):
+    """ vectorised version of TAxis.FindFixBin()
+
+    Reproduces the arithmetic used by ROOT, so every value ends up in the
+    same bin as with FindFixBin() (including under- and overflow bins).
+
+    Parameters
+    ----------
+    axis_info : tuple
+        (n_bins, x_min, x_max, edges) as created by _axis_info()
+    values : numpy array
+        values to look up
+
+    Returns
+    -------
+    bins : numpy array of int
+        bin number for each value
+
+    """
+    n_bins, x_min, x_max, edges = axis_info
+    values = numpy.asarray(values, dtype=numpy.float64)
+    bins = numpy.empty(values.shape, dtype=numpy.int64)
+    inside = (x_min <= values) & (values < x_max)
+    if edges is None:
+        bins[inside] = 1 + (n_bins*(values[inside]-x_min)/
+                            (x_max-x_min)).astype(numpy.int64)
+    else:
+        bins[inside] = numpy.searchsorted(edges, values[inside], side='right')
+    bins[values < x_min] = 0
+    bins[~(values < x_min) & ~inside] = n_bins+1
+    return bins
+
+class BinLookup(object):
+    """ vectorised GetBinContent(FindFixBin(...)) for a fixed histogram
+
+    Stores the binning and the content of a TH1/TH2/TH3 or the efficiencies
+    of a TEfficiency in numpy arrays. The object does not reference the
+    histogram itself, changes to the histogram are not picked up after
+    creation.
+
+    """
+
+    def __init__(self, hist):
+        """ copy binning and content from ''hist''
+
+        Parameters
+        ----------
+        hist : TH1F, TH2F, TH3F or TEfficiency
+            histogram to take bins and content from
+
+        """
+        try:
+            get_content = hist.GetEfficiency
+            hist = hist.GetTotalHistogram()
+        except AttributeError:
+            get_content = hist.GetBinContent
+        axes = [hist.GetXaxis(), hist.GetYaxis(), hist.GetZaxis()]
+        self._axes = [_axis_info(a) for a in axes[:hist.GetDimension()]]
+        n_cells = 1
+        for axis in self._axes:
+            n_cells *= axis[0]+2
+        self._contents = numpy.array(
+            [get_content(i) for i in range(n_cells)], dtype=numpy.float64)
+
+    @property
+    def n_dim(self):
+        """ number of dimensions of the stored histogram """
+        return len(self._axes)
+
+    def edges(self, axis=0):
+        """ get the edges of all bins along ''axis''
+
+        Parameters
+        ----------
+        axis : int
+            0, 1 or 2 for x, y or z (default: 0)
+
+        Returns
+        -------
+        edges : numpy array
+            n_bins+1 edges, from the low edge of the first bin to the high
+            edge of the last bin
+
+        """
+        n_bins, x_min, x_max, edges = self._axes[axis]
+        if edges is None:
+            # same arithmetic as TAxis.GetBinLowEdge()
+            edges = x_min + numpy.arange(n_bins+1)*((x_max-x_min)/n_bins)
+        return edges
+
+    def digest(self):
+        """ get a hash of binning and content
+
+        Returns
+        -------
+        digest : string
+            hex digest, equal for lookups with identical bins and content
+
+        """
+        sha = hashlib.sha1()
+        for n_bins, x_min, x_max, edges in self._axes:
+            sha.update(repr((n_bins, x_min, x_max)).encode("utf-8"))
+            if edges is not None:
+                sha.update(edges.tobytes())
+        sha.update(self._contents.tobytes())
+        return sha.hexdigest()
+
+    def __call__(self, *values):
+        """ look up the bin content for each point
+
+        Parameters
+        ----------
+        values : numpy arrays
+            coordinates of the points, one array per dimension (x, y, ...)
+
+        Returns
+        -------
+        contents : numpy array
+            content of the bin containing each point
+
+        """
+        if len(values) != self.n_dim:
+            raise ValueError("expected "+str(self.n_dim)+" coordinates")
+        global_bins = 0
+        stride = 1
+        for axis, vals in zip(self._axes, values):
+            global_bins = global_bins + stride*find_bins(axis, vals)
+            stride *= axis[0]+2
+        return self._contents[global_bins]
+
+    def interpolate(self, *values):
+        """ interpolate linearly between the bin centers for each point
+
+        Bi- or trilinear for 2 or 3 dimensions. Points beyond the center of
+        the first or last bin of an axis get the value at that center, the
+        under- and overflow bins are not used.
+
+        Parameters
+        ----------
+        values : numpy arrays
+            coordinates of the points, one array per dimension (x, y, ...)
+
+        Returns
+        -------
+        contents : numpy array
+            interpolated content at each point
+
+        """
+        if len(values) != self.n_dim:
+            raise ValueError("expected "+str(self.n_dim)+" coordinates")
+        corners = []
+        stride = 1
+        for i, vals in enumerate(values):
+            n_bins = self._axes[i][0]
+            edges = self.edges(i)
+            centers = 0.5*(edges[:-1]+edges[1:])
+            vals = numpy.asarray(vals, dtype=numpy.float64)
+            low = numpy.clip(numpy.searchsorted(centers, vals, side='right')-1,
+                             0, max(n_bins-2, 0))
+            high = numpy.minimum(low+1, n_bins-1)
+            width = centers[high]-centers[low]
+            width = numpy.where(width > 0, width, 1.)
+            frac = numpy.clip((vals-centers[low])/width, 0., 1.)
+            # (global bin offset, weight) for the lower and upper neighbour
+            corners.append([(stride*(low+1), 1.-frac), (stride*(high+1), frac)])
+            stride *= n_bins+2
+        result = 0.
+        for corner in itertools.product(*corners):
+            global_bins = 0
+            weight = 1.
+            for offset, axis_weight in corner:
+                global_bins = global_bins + offset
+                weight = weight*axis_weight
+            result = result + weight*self._contents[global_bins]
+        return result
+
+def _hist_signature(hist):
+    """ get numbers that change when ''hist'' is filled or rebinned """
+    try:
+        hists = [hist.GetPassedHistogram(), hist.GetTotalHistogram()]
+    except AttributeError:
+        hists = [hist]
+    return tuple((h.GetEntries(), h.GetSumOfWeights(), h.GetNbinsX(),
+                  h.GetNbinsY(), h.GetNbinsZ(), h.GetXaxis().GetXmin(),
+                  h.GetXaxis().GetXmax()) for h in hists)
+
+def get_lookup(hist, refresh=False):
+    """ get the BinLookup for ''hist'', reused until the histogram changes
+
+    The lookup is stored on the histogram together with the number of
+    entries, the sum of weights and the binning, and is recreated when one
+    of them differs. Changes not affecting these (e.g. SetBinContent()
+    followed by SetEntries()) need refresh=True.
+
+    Parameters
+    ----------
+    hist : TH1F, TH2F, TH3F or TEfficiency
+        histogram to take bins and content from
+    refresh : Boolean
+        recreate the lookup in any case (default: False)
+
+    Returns
+    -------
+    lookup : BinLookup
+        lookup with the current content of hist
+
+    """
+    signature = _hist_signature(hist)
+    cached = getattr(hist, "lookat_lookup", None)
+    if refresh or cached == None or cached[1] != signature:
+        cached = (BinLookup(hist), signature)
+        hist.lookat_lookup = cached
+    return cached[0]
+
+def _check_sumw2(hist, weights):
+    """ enable the sum of squared weights of ''hist'' for weights != 1
+
+    Fill() does the same for a single weight, so the errors stay correct
+    for histograms created without TH1.SetDefaultSumw2().
+
+    """
+    if hist.GetSumw2N() == 0 and (weights != 1).any():
+        hist.Sumw2()
+
+def fill_histogram(hist, values, weights=None):
+    """ fill all ''values'' with ''weights'' into ''hist'' using FillN
+
+    Parameters
+    ----------
+    hist : TH1F
+        histogram to fill
+    values : numpy array
+        values to fill
+    weights : numpy array
+        weight for each value (default: None, all weights 1)
+
+    """
+    n_values = len(values)
+    if n_values == 0:
+        return
+    if weights is None:
+        weights = numpy.ones(n_values)
+    _check_sumw2(hist, weights)
+    hist.FillN(n_values,
+               numpy.ascontiguousarray(values, dtype=numpy.float64),
+               numpy.ascontiguousarray(weights, dtype=numpy.float64))
+
+def fill_histogram_2d(hist, values_x, values_y, weights=None):
+    """ fill all points with ''weights'' into the 2D ''hist'' using FillN
+
+    Parameters
+    ----------
+    hist : TH2F
+        histogram to fill
+    values_x, values_y : numpy arrays
+        coordinates of the points to fill
+    weights : numpy array
+        weight for each point (default: None, all weights 1)
+
+    """
+    n_values = len(values_x)
+    if n_values == 0:
+        return
+    if weights is None:
+        weights = numpy.ones(n_values)
+    _check_sumw2(hist, weights)
+    hist.FillN(n_values,
+               numpy.ascontiguousarray(values_x, dtype=numpy.float64),
+               numpy.ascontiguousarray(values_y, dtype=numpy.float64),
+               numpy.ascontiguousarray(weights, dtype=numpy.float64))
+
+class BulkFiller(object):
+    """ replacement for calling hist.Fill() once per event
+
+    Values and weights are collected in a numpy buffer and filled with FillN
+    whenever the buffer is full, on flush() and at the end of a with-block.
+    The histogram is only complete after the last flush.
+
+    """
+
+    def __init__(self, hist, buffer_size=None, func=None, n_columns=None):
+        """ create the buffer for ''hist''
+
+        Parameters
+        ----------
+        hist : TH1F or TH2F
+            histogram to fill
+        buffer_size : int
+            number of entries collected before filling
+            (default: default_fill_buffer)
+        func : callable
+            called with the buffered columns, returns (values, weights, ...)
+            to fill into a 1D histogram, e.g. WeightedValues. A third value
+            returned is added up in n_skipped. (default: None, fill the
+            entries as passed to fill())
+        n_columns : int
+            number of values passed to fill() for each entry, needed with
+            func (default: None)
+
+        """
+        if buffer_size == None:
+            buffer_size = default_fill_buffer
+        self._hist = hist
+        self._n_dim = hist.GetDimension()
+        if self._n_dim not in [1, 2]:
+            raise NotImplementedError("only 1D and 2D histograms supported")
+        self._func = func
+        if func == None:
+            n_columns = self._n_dim+1   # values and weight
+        self._buffer = numpy.empty((n_columns, buffer_size),
+                                   dtype=numpy.float64)
+        self._n_used = 0
+        self.n_skipped = 0
+
+    def __repr__(self):
+        """ get informativ string representation """
+        return "<BulkFiller object ("+self._hist.GetName()+", "+\
+               str(self._n_used)+" buffered)>"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
+        return False
+
+    def fill(self, *args):
+        """ add one entry, arguments as for TH1.Fill(): x[, y][, weight]
+
+        With func, the n_columns values for func are passed instead.
+
+        """
+        if self._func == None and len(args) == self._n_dim:
+            args = args+(1.0,)
+        self._buffer[:, self._n_used] = args
+        self._n_used += 1
+        if self._n_used == self._buffer.shape[1]:
+            self.flush()
+
+    def flush(self):
+        """ fill all buffered entries into the histogram """
+        n_used = self._n_used
+        if n_used == 0:
+            return
+        self._n_used = 0
+        columns = list(self._buffer[:, :n_used])
+        if self._func == None:
+            fill_columns([self._hist], columns[:-1], columns[-1])
+            return
+        result = self._func(columns)
+        if len(result) > 2:
+            self.n_skipped += result[2]
+        fill_columns([self._hist], [result[0]], result[1])
+
+class WeightedValues(object):
+    """ turn the columns (var, lookup vars...) of a block into weighted values
+
+    The object is picklable, so it can be passed to worker processes.
+
+    """
+
+    def __init__(self, lookup, inverse_weight=False):
+        """ store the lookup and how to weight the values
+
+        Parameters
+        ----------
+        lookup : BinLookup
+            bins used to look up the weights
+        inverse_weight : Boolean
+            if set to True, events are weighted with 1/weight and events with
+            weight 0 are skipped (default: False)
+
+        """
+        self._lookup = lookup
+        self._inverse_weight = inverse_weight
+
+    def __call__(self, columns):
+        """ look up the weights for all events of the block
+
+        Returns
+        -------
+        values, weights : numpy arrays
+            values and weights to fill
+        n_skipped : int
+            number of events skipped because of a weight of 0
+
+        """
+        weights = self._lookup(*columns[1:])
+        if not self._inverse_weight:
+            return columns[0], weights, 0
+        valid = weights != 0
+        n_skipped = len(weights)-numpy.count_nonzero(valid)
+        return columns[0][valid], 1./weights[valid], n_skipped
+
+def fill_columns(histos, columns, weights=None):
+    """ fill consecutive columns into a list of 1D and 2D histograms
+
+    Each 1D histogram takes one column, each 2D histogram two (x, y).
+
+    Parameters
+    ----------
+    histos : list of TH1F or TH2F
+        histograms to fill
+    columns : list of numpy arrays
+        values to fill, in order of the histograms
+    weights : numpy array
+        weight for each entry (default: None, all weights 1)
+
+    """
+    i = 0
+    for hist in histos:
+        if hist.GetDimension() == 1:
+            fill_histogram(hist, columns[i], weights)
+            i += 1
+        else:
+            fill_histogram_2d(hist, columns[i], columns[i+1], weights)
+            i += 2
+
+class PartialFill(object):
+    """ fill the values returned by a function into an empty copy of a
+    histogram
+
+    The object is picklable, so the histogram is filled in the worker
+    processes and only the partial histograms are sent back.
+
+    """
+
+    def __init__(self, func, hist):
+        """ store the function and an empty copy of ''hist''
+
+        Parameters
+        ----------
+        func : callable
+            called with the columns of a block, returns (values, weights,
+            ...)
+        hist : TH1F
+            histogram whose binning the partial histograms use
+
+        """
+        self._func = func
+        self._template = hist.Clone(hist.GetName()+"_part")
+        self._template.SetDirectory(0)
+        self._template.Reset()
+
+    def __call__(self, columns):
+        """ fill the values of one block into a new partial histogram
+
+        Returns
+        -------
+        result : tuple
+            (partial histogram, further return values of func...)
+
+        """
+        result = self._func(columns)
+        part = self._template.Clone()
+        part.SetDirectory(0)
+        fill_histogram(part, result[0], result[1])
+        return (part,)+tuple(result[2:])
+
+def fill_blocks(hist, tree, exprs, select, func, block_size=None,
+                n_workers=None):
+    """ fill the values returned by ''func'' for each block into ''hist''
+
+    With n_workers > 1, each worker fills its blocks into a partial
+    histogram, and the partial histograms are added to ''hist'' in the
+    order of the entries. Histograms with automatic range (buffer) take the
+    values themselves, the partial histograms could not be added.
+
+    Parameters
+    ----------
+    hist : TH1F
+        histogram to fill
+    tree : TTree
+        tree to read from
+    exprs : list of strings (TFormula)
+        expressions to evaluate, one column per expression
+    select : string
+        selection to appy
+    func : callable
+        called with the list of columns of each block, returns (values,
+        weights, ...), must be picklable if n_workers > 1
+    block_size : int
+        number of entries processed per block (default: default_block_size)
+    n_workers : int
+        number of worker processes (default: None, process serially)
+
+    Returns
+    -------
+    extras : list of tuples
+        further return values of func, one tuple per block
+
+    """
+    extras = []
+    if n_workers != None and n_workers > 1 and hist.GetBufferSize() == 0:
+        func = PartialFill(func, hist)
+        for result in map_blocks(tree, exprs, select, func, block_size,
+                                 n_workers):
+            part = result[0]
+            part.SetDirectory(0)
+            hist.Add(part)
+            extras.append(result[1:])
+        return extras
+    for result in map_blocks(tree, exprs, select, func, block_size, n_workers):
+        fill_histogram(hist, result[0], result[1])
+        extras.append(result[2:])
+    return extras
+
+def fill_weighted(h_out, var, lookup, lookup_vars, tree, select="",
+                  inverse_weight=False, block_size=None, n_workers=None):
+    """ fill ''var'' into ''h_out'' weighted by bins of ''lookup''
+
+    Parameters
+    ----------
+    h_out : TH1F
+        histogram to fill
+    var : string (TFormula)
+        variable to fill into h_out
+    lookup : BinLookup
+        bins used to look up the weights
+    lookup_vars : list of strings (TFormula)
+        variables used for the lookup, in order x, y
+    tree : TTree
+        tree to take events from
+    select : string
+        selection to appy (default: "")
+    inverse_weight : Boolean
+        if set to True, events are weighted with 1/weight and events with
+        weight 0 are skipped (default: False)
+    block_size : int
+        number of entries processed per block (default: default_block_size)
+    n_workers : int
+        number of worker processes (default: None, process serially)
+
+    Returns
+    -------
+    n_skipped : int
+        number of events skipped because of a weight of 0
+
+    """
+    func = WeightedValues(lookup, inverse_weight)
+    extras = fill_blocks(h_out, tree, [var]+lookup_vars, select, func,
+                         block_size, n_workers)
+    return sum(extra[0] for extra in extras)
@@ -9,15 +9,100 @@ License: GNU General Public License version 2,
          or (at your option) any later version.
 
 """
-from ROOT import TH1F, TH2F, TMath
+import re
+import numpy
+from lookat.lazyroot import ROOT
+from lookat.columnar import get_lookup, fill_blocks, fill_histogram
 gImports = []
 
+def _gaus(x, mean=0, sigma=1, norm=False):
+    """ numpy version of TMath::Gaus """
+    values = numpy.exp(-0.5*((x-mean)/numpy.asarray(sigma, float))**2)
+    if norm:
+        values = values/(numpy.sqrt(2*numpy.pi)*sigma)
+    return values
+
+def _tmath_function(name):
+    """ vectorised version of the TMath function ''name'' """
+    return numpy.vectorize(getattr(ROOT.TMath, name), otypes=[numpy.float64])
+
+class _SpecialFunction(object):
+    """ scipy.special function, importing scipy on first use
+
+    Falls back to the vectorised TMath function if scipy is not available.
+
+    """
+
+    def __init__(self, special_name, tmath_name):
+        self._special_name = special_name
+        self._tmath_name = tmath_name
+        self._function = None
+
+    def __repr__(self):
+        """ get informativ string representation """
+        return "<_SpecialFunction object ("+self._tmath_name+")>"
+
+    def __call__(self, *args):
+        """ evaluate the function """
+        if self._function == None:
+            try:
+                from scipy import special
+                self._function = getattr(special, self._special_name)
+            except ImportError:
+                self._function = _tmath_function(self._tmath_name)
+        return self._function(*args)
+
+def _default_tmath():
+    """ create the namespace with the numpy versions of common TMath names """
+    namespace = {
+        'Abs'   : numpy.abs,
+        'Sqrt'  : numpy.sqrt,
+        'Exp'   : numpy.exp,
+        'Log'   : numpy.log,
+        'Log2'  : numpy.log2,
+        'Log10' : numpy.log10,
+        'Power' : numpy.power,
+        'Sq'    : numpy.square,
+        'Sin'   : numpy.sin,
+        'Cos'   : numpy.cos,
+        'Tan'   : numpy.tan,
+        'ASin'  : numpy.arcsin,
+        'ACos'  : numpy.arccos,
+        'ATan'  : numpy.arctan,
+        'ATan2' : numpy.arctan2,
+        'SinH'  : numpy.sinh,
+        'CosH'  : numpy.cosh,
+        'TanH'  : numpy.tanh,
+        'Floor' : numpy.floor,
+        'Ceil'  : numpy.ceil,
+        'Hypot' : numpy.hypot,
+        'Min'   : numpy.minimum,
+        'Max'   : numpy.maximum,
+        'Sign'  : lambda a, b: numpy.copysign(numpy.abs(a), b),
+        'Gaus'  : _gaus,
+        'Pi'    : lambda: numpy.pi,
+        'E'     : lambda: numpy.e,
+    }
+    for special_name, tmath_name in [('erf', 'Erf'), ('erfc', 'Erfc'),
+                                     ('ndtr', 'Freq'), ('gamma', 'Gamma'),
+                                     ('gammaln', 'LnGamma')]:
+        namespace[tmath_name] = _SpecialFunction(special_name, tmath_name)
+    ### lower case names known to TFormula
+    for name in ['Sqrt', 'Exp', 'Log', 'Log10', 'Sin', 'Cos', 'Tan', 'ASin',
+                 'ACos', 'ATan', 'ATan2', 'SinH', 'CosH', 'TanH', 'Abs']:
+        namespace[name.lower()] = namespace[name]
+    namespace['pow'] = numpy.power
+    return namespace
+
+gTMath = _default_tmath()
+
 def add_tmath(names):
-    """ add a TMath function to the list of functions loaded before evaluating
+    """ make more TMath functions available to python's eval()
 
     When ROOT evaluates TFormulas, i.e. in TTree.Draw(), the names from TMath
-    are available. To use python's eval() instead, these names must be imported
-    into python.
+    are available. Common names are already mapped to numpy functions (see
+    gTMath). Other names have to be registered here, they are added as
+    vectorised versions of the TMath function.
 
     Parameters
     ----------
@@ -25,10 +110,110 @@ def add_tmath(names):
         names to bring from TMath into python
 
     """
-    if type(names) == list:
-        gImports.extend( names )
-    else:
-        gImports.append( names )
+    if type(names) != list:
+        names = [names]
+    for name in names:
+        if name not in gTMath:
+            gTMath[name] = _tmath_function(name)
+        if name not in gImports:
+            gImports.append(name)
+
+def _tmath_namespace():
+    """ get the namespace with the TMath names
+
+    Returns
+    -------
+    namespace : dict
+        globals used to evaluate a CompiledExpr (gTMath)
+
+    """
+    return gTMath
+
+class Columns(dict):
+    """ dictionary of column arrays, accessible as attributes
+
+    Stands in for a tree entry when a CompiledExpr is evaluated for a whole
+    block of events.
+
+    """
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+class CompiledExpr(object):
+    """ python version of a TFormula, compiled once for repeated evaluation
+
+    The expression can be evaluated either for a single tree entry or for a
+    Columns object holding numpy arrays, in which case all events of the
+    block are processed in one call.
+
+    """
+
+    def __init__(self, formula, source, branches, prefix="evt."):
+        """ compile the translated expression
+
+        Parameters
+        ----------
+        formula : string (TFormula)
+            the original expression
+        source : string
+            python version of formula, parts separated by ':'
+        branches : list of strings
+            names of all branches used in the expression
+        prefix : string
+            prefix used for branch-names, i.e. loop-variable (default: 'evt.')
+
+        """
+        self.formula  = formula
+        self.source   = source
+        self.branches = branches
+        self._name    = prefix.rstrip(".")
+        self._codes   = [compile(part, "<"+part+">", "eval")
+                         for part in source.split(":")]
+
+    def __getstate__(self):
+        """ drop the code objects for pickling, they are recompiled """
+        state = dict(self.__dict__)
+        del state['_codes']
+        return state
+
+    def __setstate__(self, state):
+        """ restore a pickled expression and compile it again """
+        self.__dict__.update(state)
+        self._codes = [compile(part, "<"+part+">", "eval")
+                       for part in self.source.split(":")]
+
+    def __repr__(self):
+        """ get informativ string representation """
+        return "<CompiledExpr object ("+self.source+")>"
+
+    def __str__(self):
+        """ get the python version of the expression """
+        return self.source
+
+    def __call__(self, evt, namespace=None):
+        """ evaluate all parts of the expression
+
+        Parameters
+        ----------
+        evt : TTree entry or Columns
+            values of the branches
+        namespace : dict
+            globals for the evaluation (default: gTMath)
+
+        Returns
+        -------
+        values : list
+            one value (or array for Columns) per ':'-separated part
+
+        """
+        if namespace == None:
+            namespace = _tmath_namespace()
+        evt_dict = {self._name: evt}
+        return [eval(code, namespace, evt_dict) for code in self._codes]
 
 def get_1d(hist, val_str, evt):
     """ get content of bin containing the passed event
@@ -39,21 +224,23 @@ def get_1d(hist, val_str, evt):
     ----------
     hist : TH1F
         histogram from which to get the content
-    val_str : string
-        string describing variable filled into hist
-        branches need to be written as evt.<<branch_name>>
-    evt : TTree entry
-        event to find bin for
+    val_str : CompiledExpr
+        expression describing variable filled into hist
+        as returned by prepare_eval()
+    evt : TTree entry or Columns
+        event to find bin for, or block of events
 
     Returns
     -------
-    ret_val : double
+    ret_val : double or numpy array
         content into which evt would fall
 
     """
-    return hist.GetBinContent(
-               hist.FindFixBin( eval(val_str) )
-           )
+    value = val_str(evt)[0]
+    if numpy.ndim(value) == 0:
+        # single event: FindFixBin is faster than a lookup
+        return hist.GetBinContent(hist.FindFixBin(value))
+    return get_lookup(hist)(value)
 
 def get_2d(hist, val_str, evt):
     """ get content of bin containing the passed event
@@ -64,30 +251,204 @@ def get_2d(hist, val_str, evt):
     ----------
     hist : TH1F
         histogram from which to get the content
-    val_str : string
-        string describing variable filled into hist
-        branches need to be written as evt.<<branch_name>>
+    val_str : CompiledExpr
+        expression describing variable filled into hist
+        as returned by prepare_eval()
         ATTENTION: the order for 2d histograms is y_values:x_values!
-    evt : TTree entry
-        event to find bin for
+    evt : TTree entry or Columns
+        event to find bin for, or block of events
 
     Returns
     -------
-    ret_val : double
+    ret_val : double or numpy array
         content into which evt would fall
 
     """
-    val_y, val_x = val_str.split(':')
-    return hist.GetBinContent(  hist.FindFixBin(
-                eval(val_x),
-                eval(val_y)
-           ) )
+    val_y, val_x = val_str(evt)
+    if numpy.ndim(val_x) == 0 and numpy.ndim(val_y) == 0:
+        return hist.GetBinContent(hist.FindFixBin(val_x, val_y))
+    return get_lookup(hist)(val_x, val_y)
+
+def _split_top(expr, separator):
+    """ split ''expr'' at each ''separator'' outside of any brackets """
+    parts = []
+    depth = 0
+    start = 0
+    i = 0
+    while i < len(expr):
+        if expr[i] in "([":
+            depth += 1
+        elif expr[i] in ")]":
+            depth -= 1
+        elif depth == 0 and expr.startswith(separator, i):
+            parts.append(expr[start:i])
+            start = i+len(separator)
+            i = start
+            continue
+        i += 1
+    parts.append(expr[start:])
+    return parts
+
+def _logical_ops(expr):
+    """ replace '||' and '&&' by '|' and '&', comparing the operands to 0 """
+    for c_op, np_op in [("||", "|"), ("&&", "&")]:
+        parts = _split_top(expr, c_op)
+        if len(parts) > 1:
+            return np_op.join("(("+_logical_ops(p).strip()+")!=0)"
+                              for p in parts)
+    ### no operator on this level, translate the content of the brackets
+    out = []
+    depth = 0
+    start = 0
+    for i, char in enumerate(expr):
+        if char == "(":
+            depth += 1
+            if depth == 1:
+                out.append(expr[start:i+1])
+                start = i+1
+        elif char == ")":
+            depth -= 1
+            if depth == 0:
+                out.append(",".join(_logical_ops(arg)
+                                    for arg in _split_top(expr[start:i], ",")))
+                start = i
+    out.append(expr[start:])
+    return "".join(out)
+
+def _skip_brackets(expr, start):
+    """ get the position after the bracket opened at ''start'' """
+    depth = 0
+    for i in range(start, len(expr)):
+        if expr[i] in "([":
+            depth += 1
+        elif expr[i] in ")]":
+            depth -= 1
+            if depth == 0:
+                return i+1
+    return len(expr)
+
+def _operand_end(expr, start):
+    """ get the end of the unary operand starting at ''start'' """
+    i = start
+    while i < len(expr) and expr[i] == " ":
+        i += 1
+    if expr.startswith("!", i) and not expr.startswith("!=", i):
+        return _operand_end(expr, i+1)
+    match = re.match(r"[\w.]*", expr[i:])
+    i += match.end()
+    while i < len(expr) and expr[i] in "([":
+        i = _skip_brackets(expr, i)
+    return i
+
+def _logical_not(expr):
+    """ replace '!x' by '((x)==0)' """
+    out = []
+    i = 0
+    while i < len(expr):
+        if expr[i] == "!" and not expr.startswith("!=", i):
+            end = _operand_end(expr, i+1)
+            out.append("(("+_logical_not(expr[i+1:end]).strip()+")==0)")
+            i = end
+        else:
+            out.append(expr[i])
+            i += 1
+    return "".join(out)
+
+def numpy_formula(var_str):
+    """ translate the logical operators of a TFormula for numpy arrays
+
+    '&&' and '||' become '&' and '|' with each operand compared to 0, '!x'
+    becomes '((x)==0)'. This gives boolean arrays for numeric operands as
+    well (snapshot columns are float64), where '&' and '~' would fail or
+    act bitwise. Operators inside brackets (and function arguments) are
+    translated on their own, e.g. '(x>0 && y>0)*w' becomes
+    '(((x>0)!=0)&((y>0)!=0))*w'.
+
+    Parameters
+    ----------
+    var_str : string (TFormula)
+        expression to translate, parts separated by ':'
+
+    Returns
+    -------
+    output : string
+        expression for element-wise evaluation
+
+    """
+    parts = []
+    for part in _split_top(var_str, ":"):
+        parts.append(_logical_not(_logical_ops(part)))
+    return ":".join(parts)
+
+_token_re = re.compile(r"(\d+\.?\d*(?:[eE][+-]?\d+)?|\.\d+(?:[eE][+-]?\d+)?)"
+                       r"|(\.?)([A-Za-z_]\w*)")
+_translations = {}
+
+def _branch_names(tree):
+    """ get the set of branch names of ''tree'', stored on the tree """
+    try:
+        return tree.lookat_branch_names
+    except AttributeError:
+        names = frozenset(b.GetName() for b in tree.GetListOfBranches())
+        tree.lookat_branch_names = names
+        return names
+
+def _identifiers(var_str):
+    """ get all identifiers in ''var_str'', not counting attributes """
+    return [m.group(3) for m in _token_re.finditer(var_str)
+            if m.group(3) != None and m.group(2) == ""]
+
+def _used_branches(var_str, branches):
+    """ get the names in ''branches'' used in ''var_str'' (in order) """
+    used = []
+    for name in _identifiers(var_str):
+        if name in branches and name not in used:
+            used.append(name)
+    return used
+
+def referenced_branches(tree, exprs):
+    """ get the branches of ''tree'' needed to evaluate all expressions
+
+    Uses the same matching as prepare_eval(), so a branch is included
+    whenever its name appears as identifier in one of the expressions.
+
+    Parameters
+    ----------
+    tree : TTree
+        used to get list of all branch-names
+    exprs : list of strings (TFormula)
+        expressions to evaluate
+
+    Returns
+    -------
+    branches : list of strings
+        names of the branches used
+
+    """
+    branches = _branch_names(tree)
+    used = set()
+    for var_str in exprs:
+        used.update(_used_branches(var_str, branches))
+    return sorted(used)
+
+def _translate(var_str, branches, prefix):
+    """ prepend ''prefix'' to all identifiers in ''var_str'' naming a branch """
+    def replace(match):
+        """ translate a single token """
+        if match.group(3) != None and match.group(2) == "" and \
+           match.group(3) in branches:
+            return prefix+match.group(3)
+        return match.group(0)
+    return _token_re.sub(replace, var_str)
 
 def prepare_eval(var_str, tree, prefix="evt."):
-    """ translate a ROOT TFormula into an pyzthon eval() expression
+    """ translate a ROOT TFormula into a compiled python expression
 
     Prepends all branch names in ''var_str'' with ''prefix'', i.e. turning
-    particle_pt into evt.particle_pt by default.
+    particle_pt into evt.particle_pt by default, and compiles the result.
+    The expression is split into numbers and identifiers in one pass, only
+    whole identifiers are matched against the branch names. Results are
+    memoized per expression and set of branch names.
 
     Parameters
     ----------
@@ -100,31 +461,81 @@ def prepare_eval(var_str, tree, prefix="evt."):
 
     Returns
     -------
-    val_str : string
-        string describing variable defined by var_str
+    val_expr : CompiledExpr
+        compiled expression for the variable defined by var_str
 
     """
-    branches = [b.GetName() for b in tree.GetListOfBranches()]
-    var_parts = var_str.split(":")
-    ret_val = []
-    for part in var_parts:
-        part = "1*"+part
-        for branch in branches:
-            part = part.replace(branch, "$"+branch)
-        part_list = part.split("$")
-        try:
-            while True:
-                part_list.remove('')
-        except ValueError:
-            pass
-        ret_val.append(prefix.join(part_list).lstrip("1*"))
-    return ":".join(ret_val)
-
-def fill_corr_eval(h_out, var, h_eff, eff_var, tree, select=""):
+    branches = _branch_names(tree)
+    key = (var_str, branches, prefix)
+    if key not in _translations:
+        source = ":".join(_translate(part, branches, prefix).strip()
+                          for part in var_str.split(":"))
+        used = _used_branches(var_str, branches)
+        _translations[key] = CompiledExpr(var_str, source, used, prefix)
+    return _translations[key]
+
+class CorrectedValues(object):
+    """ turn the branch columns of a block into efficiency corrected values
+
+    The object is picklable, so it can be passed to worker processes.
+
+    """
+
+    def __init__(self, eval_var, eval_eff, lookup, branches, interpolate=False):
+        """ store expressions and efficiency lookup
+
+        Parameters
+        ----------
+        eval_var : CompiledExpr
+            variable to fill
+        eval_eff : CompiledExpr
+            variable(s) used for the efficiency lookup
+        lookup : BinLookup
+            efficiencies to look up
+        branches : list of strings
+            names of the branches, in order of the columns
+        interpolate : Boolean
+            interpolate between the bin centers instead of taking the
+            content of the bin (default: False)
+
+        """
+        self._eval_var    = eval_var
+        self._eval_eff    = eval_eff
+        self._lookup      = lookup
+        self._branches    = branches
+        self._interpolate = interpolate
+
+    def __call__(self, block):
+        """ evaluate values and weights for all events of the block
+
+        Returns
+        -------
+        values, weights : numpy arrays
+            values and weights to fill
+
+        """
+        namespace = _tmath_namespace()
+        evt = Columns(zip(self._branches, block))
+        n_events = len(block[0])
+        values = self._eval_var(evt, namespace)[0]*numpy.ones(n_events)
+        eff_values = [v*numpy.ones(n_events)
+                      for v in self._eval_eff(evt, namespace)]
+        if self._interpolate:
+            eff = self._lookup.interpolate(*eff_values[::-1])
+        else:
+            eff = self._lookup(*eff_values[::-1])
+        if not eff.all():
+            raise ZeroDivisionError("event with 0 efficiency")
+        return values, 1./eff
+
+def fill_corr_eval(h_out, var, h_eff, eff_var, tree, select="", n_workers=None, selections=None,
+                   interpolate=False):
     """ fill events from ''tree'' into ''h_out'' weighted by ''h_eff''
 
     fill ''var'' into the histogram ''h_out'' and weight each event with the
-    inverse of its efficiency given in ''h_eff''.
+    inverse of its efficiency given in ''h_eff''. The events are read in
+    blocks and the compiled expressions are evaluated for a whole block at
+    once.
 
     Parameters
     ----------
@@ -132,30 +543,47 @@ def fill_corr_eval(h_out, var, h_eff, eff_var, tree, select=""):
         histogram to fill
     var : string (TFormula)
         variable to fill into h_out
-    h_eff : TH1F or TH2F
+    h_eff : TH1F, TH2F, TH3F or TEfficiency
         efficency histogram used to look up weights
     eff_var : string (TFromula)
-        variable(s) used in h_eff
-    tree : TTree
+        variable(s) used in h_eff, "z:y:x" order as for TTree.Draw()
+    tree : TTree or Snapshot
         tree to take events from
     select : string
         selection to appy (default: "")
+    n_workers : int
+        number of worker processes reading the tree in parallel
+        (default: None, process serially, ignored for snapshots)
+    selections : SelectionCache
+        cache to take the entries passing select from, used when
+        processing serially (default: None, evaluate select)
+    interpolate : Boolean
+        interpolate the efficiency linearly between the bin centers
+        (bi-/trilinear for 2d/3d) instead of taking the content of the bin
+        (default: False)
 
     """
-    for imp in gImports:
-        globals()[imp] = eval("TMath."+imp)
     h_type = type(h_eff)
-    if h_type == TH1F:
-        get = get_1d
-    elif h_type == TH2F:
-        get = get_2d
-    else:
+    if h_type not in [ROOT.TH1F, ROOT.TH2F, ROOT.TH3F, ROOT.TEfficiency]:
         raise NotImplementedError(
           "type off h_eff ("+str(h_type)+") not supported")
     eval_var = prepare_eval(var, tree)
     eval_eff = prepare_eval(eff_var, tree)
     h_out.var_info = var
-    for evt in tree.CopyTree(select):
-        eff = get(h_eff, eval_eff, evt)
-        h_out.Fill(eval(eval_var), 1./eff )
+    branches = sorted(set(eval_var.branches) | set(eval_eff.branches))
+    func = CorrectedValues(eval_var, eval_eff, get_lookup(h_eff), branches,
+                           interpolate)
+    try:
+        # snapshots evaluate their mapped columns directly
+        blocks = (func(block) for block in tree.iter_blocks(branches, select))
+    except AttributeError:
+        if selections != None and (n_workers == None or n_workers <= 1):
+            with selections.use(tree, select):
+                fill_blocks(h_out, tree, branches, select, func)
+        else:
+            fill_blocks(h_out, tree, branches, select, func,
+                        n_workers=n_workers)
+        return
+    for values, weights in blocks:
+        fill_histogram(h_out, values, weights)
 
@@ -0,0 +1,293 @@
+# pylint: disable-msg=E0611, C0103
+""" fileio.py - open and check many root files at once
+
+This file is part of lookat
+
+Copyright 2013, Nicola Chiapolini, nicola.chiapolini@physik.uzh.ch
+
+License: GNU General Public License version 2,
+         or (at your option) any later version.
+
+Opening a file mostly waits for the (network) filesystem, so files that
+only need to be checked are opened in a small pool of worker processes.
+All files are checked before any of them is used, so broken files are
+reported together and right away.
+The number of entries found is kept in an index, so unchanged files do not
+need to be opened again to build a chain.
+Listing the content of a file only reads the key headers.
+
+"""
+import os
+import glob
+import json
+from collections import namedtuple
+from fnmatch import fnmatch
+import multiprocessing
+from lookat.lazyroot import ROOT
+from lookat.cache import default_directory, file_identity
+
+default_n_workers = 8
+
+try:
+    _string_types = basestring
+except NameError:
+    _string_types = str
+
+def expand_names(names):
+    """ turn a file name, glob pattern or list of those into a list of names
+
+    Parameters
+    ----------
+    names : string or list of strings
+        file names, local names may contain shell wildcards
+
+    Returns
+    -------
+    file_names : list of strings
+        matching file names in the given order, without duplicates
+
+    """
+    if isinstance(names, _string_types):
+        names = [names]
+    file_names = []
+    for name in names:
+        matches = [name]
+        if "://" not in name and glob.has_magic(name):
+            matches = sorted(glob.glob(name))
+            if len(matches) == 0:
+                raise RuntimeError("no files matching "+name)
+        for match in matches:
+            if match not in file_names:
+                file_names.append(match)
+    return file_names
+
+def file_key(name):
+    """ get a name identifying the file, same for all paths to it """
+    if "://" in name:
+        return name
+    return os.path.realpath(name)
+
+def _check_file(task):
+    """ open one file and check it (runs in a worker process if the file
+    is not kept open)
+
+    Parameters
+    ----------
+    task : tuple
+        (file name, tree name or None, keep file open)
+
+    Returns
+    -------
+    result : tuple
+        (file name, TFile or None, number of entries or None, error or None)
+
+    """
+    name, tree_name, keep_open = task
+    the_file = ROOT.TFile.Open(name)
+    if not the_file or the_file.IsZombie():
+        return (name, None, None, "can not be read")
+    n_entries = None
+    error = None
+    if tree_name != None:
+        tree = the_file.Get(tree_name)
+        if not tree or not tree.InheritsFrom("TTree"):
+            error = "contains no tree "+tree_name
+        else:
+            n_entries = int(tree.GetEntries())
+    if error != None or not keep_open:
+        the_file.Close()
+        the_file = None
+    return (name, the_file, n_entries, error)
+
+def check_files(names, tree_name=None, keep_open=False, n_workers=None):
+    """ open all files and report the broken ones
+
+    Files kept open are opened one after the other in this process, files
+    that are only checked are opened in parallel in worker processes.
+
+    Parameters
+    ----------
+    names : list of strings
+        file names to check
+    tree_name : string
+        tree every file has to contain (default: None, no check)
+    keep_open : Boolean
+        return the opened TFiles instead of closing them (default: False)
+    n_workers : int
+        maximal number of files checked at the same time
+        (default: default_n_workers)
+
+    Returns
+    -------
+    results : list of tuples
+        (file name, TFile or None, number of entries or None) for each name
+
+    Raises
+    ------
+    RuntimeError
+        listing all files that can not be used
+
+    """
+    if n_workers == None:
+        n_workers = default_n_workers
+    if len(names) == 0:
+        return []
+    tasks = [(name, tree_name, keep_open) for name in names]
+    dir_path = ROOT.gDirectory.GetPath()
+    if keep_open or n_workers <= 1 or len(names) == 1:
+        try:
+            results = [_check_file(task) for task in tasks]
+        finally:
+            ROOT.gROOT.cd(dir_path)
+    else:
+        pool = multiprocessing.Pool(min(n_workers, len(names)))
+        try:
+            results = pool.map(_check_file, tasks)
+        finally:
+            pool.close()
+            pool.join()
+    failed = ["   "+name+": "+error for name, _, _, error in results
+              if error != None]
+    if len(failed) > 0:
+        for _, the_file, _, _ in results:
+            if the_file != None:
+                the_file.Close()
+        raise RuntimeError("\n".join([str(len(failed))+" unusable files:"] +
+                                     failed))
+    return [result[:3] for result in results]
+
+class EntryIndex(object):
+    """ number of entries of trees in unchanged files, stored on disk """
+
+    def __init__(self, path=None):
+        """ create an index stored in ''path''
+
+        The file is read on first use and written when new counts are added.
+
+        Parameters
+        ----------
+        path : string
+            json file for the index (default: entries.json in the cache
+            directory)
+
+        """
+        if path == None:
+            path = os.path.join(default_directory, "entries.json")
+        self._path = path
+        self._index = None
+
+    def _load(self):
+        """ get the index, read from disk on first use """
+        if self._index == None:
+            self._index = {}
+            if os.path.exists(self._path):
+                with open(self._path) as in_file:
+                    self._index = json.load(in_file)
+        return self._index
+
+    def _save(self):
+        """ write the index to disk """
+        directory = os.path.dirname(self._path)
+        if directory != "" and not os.path.isdir(directory):
+            os.makedirs(directory)
+        tmp_path = self._path+"."+str(os.getpid())
+        with open(tmp_path, "w") as out_file:
+            json.dump(self._index, out_file, indent=1, sort_keys=True)
+        os.rename(tmp_path, self._path)
+
+    @staticmethod
+    def _key(name, tree_name):
+        """ get the key for ''tree_name'' in ''name'', None if not local """
+        if "://" in name:
+            return None
+        try:
+            os.stat(name)
+        except OSError:
+            return None
+        return tree_name+"||"+file_identity(name)
+
+    def lookup(self, names, tree_name):
+        """ get the stored number of entries for each file
+
+        Parameters
+        ----------
+        names : list of strings
+            file names
+        tree_name : string
+            name (and path) of the tree
+
+        Returns
+        -------
+        counts : list of int
+            number of entries for each file, None if not known
+
+        """
+        index = self._load()
+        return [index.get(self._key(name, tree_name)) for name in names]
+
+    def store(self, names, tree_name, counts):
+        """ add the number of entries of ''tree_name'' for each file
+
+        Parameters
+        ----------
+        names : list of strings
+            file names
+        tree_name : string
+            name (and path) of the tree
+        counts : list of int
+            number of entries for each file, None entries are ignored
+
+        """
+        index = self._load()
+        for name, count in zip(names, counts):
+            key = self._key(name, tree_name)
+            if key != None and count != None:
+                index[key] = count
+        self._save()
+
+KeyInfo = namedtuple("KeyInfo", ["path", "name", "class_name", "cycle",
+                                 "obj_bytes", "zip_bytes", "depth"])
+
+def walk_keys(directory, max_depth=None, class_name=None, name=None, _depth=0):
+    """ loop over the keys of ''directory'' and its sub-directories
+
+    Only the key headers are read. Sub-directories are opened to list their
+    keys, no other object is read.
+
+    Parameters
+    ----------
+    directory : TDirectory
+        file or directory to list
+    max_depth : int
+        do not descend further than this many levels (default: None, all)
+    class_name : string
+        shell pattern, only keys of matching classes are returned
+        (default: None, all)
+    name : string
+        shell pattern, only keys with matching names are returned
+        (default: None, all)
+
+    Yields
+    ------
+    key_info : KeyInfo
+        path of the directory, name, class name, cycle, uncompressed and
+        compressed size and depth of each key
+
+    """
+    path = directory.GetPath().split(':', 1)[-1]
+    for key in directory.GetListOfKeys():
+        info = KeyInfo(path, key.GetName(), key.GetClassName(),
+                       key.GetCycle(), key.GetObjlen(), key.GetNbytes(),
+                       _depth)
+        if (class_name == None or fnmatch(info.class_name, class_name)) and \
+           (name == None or fnmatch(info.name, name)):
+            yield info
+        if max_depth != None and _depth >= max_depth:
+            continue
+        the_class = ROOT.TClass.GetClass(info.class_name)
+        if the_class and the_class.InheritsFrom("TDirectory"):
+            sub_dir = directory.GetDirectory(info.name)
+            if sub_dir:
+                for sub_info in walk_keys(sub_dir, max_depth, class_name,
+                                          name, _depth+1):
+                    yield sub_info
@@ -0,0 +1,75 @@
+# pylint: disable-msg=E0611, C0103
+""" friends.py - combine trees with an index on common keys
+
+This file is part of lookat
+
+Copyright 2013, Nicola Chiapolini, nicola.chiapolini@physik.uzh.ch
+
+License: GNU General Public License version 2,
+         or (at your option) any later version.
+
+The friend tree gets a sorted index on the key expressions (TTreeIndex).
+For every entry of the main tree, ROOT evaluates the same expressions and
+finds the matching friend entry by binary search, so the entries of both
+trees do not need to be in the same order.
+
+"""
+
+def build_index(tree, keys):
+    """ create the index of ''tree'' on ''keys'', unless it exists already
+
+    Parameters
+    ----------
+    tree : TTree or TChain
+        tree to index
+    keys : list of strings
+        one or two expressions identifying an entry, e.g. ["run", "event"]
+
+    Returns
+    -------
+    index : TVirtualIndex
+        the index of tree
+
+    """
+    if len(keys) not in [1, 2]:
+        raise ValueError("an index is built on one or two keys")
+    major = keys[0]
+    minor = "0"
+    if len(keys) == 2:
+        minor = keys[1]
+    index = tree.GetTreeIndex()
+    if not index or index.GetMajorName() != major or \
+       index.GetMinorName() != minor:
+        tree.BuildIndex(major, minor)
+        index = tree.GetTreeIndex()
+    return index
+
+def join(tree, other, keys, alias=None):
+    """ attach ''other'' to ''tree'', matching entries by ''keys''
+
+    After joining, expressions for tree can use the branches of other,
+    prefixed with the alias, e.g. "pt - truth.pt". The key expressions must
+    be valid in both trees. Background jobs and worker processes reopen
+    the main tree from its files and do not see the friend.
+
+    Parameters
+    ----------
+    tree : TTree or TChain
+        main tree
+    other : TTree or TChain
+        friend tree, gets the index
+    keys : list of strings
+        one or two expressions identifying an entry, e.g. ["run", "event"]
+    alias : string
+        name to refer to other (default: name of other)
+
+    Returns
+    -------
+    friend : TFriendElement
+        the friend attached to tree
+
+    """
+    build_index(other, keys)
+    if alias == None:
+        alias = other.GetName()
+    return tree.AddFriend(other, alias)
@@ -0,0 +1,71 @@
+# pylint: disable-msg=C0103
+""" lazyroot.py - import ROOT on first use
+
+This file is part of lookat
+
+Copyright 2013, Nicola Chiapolini, nicola.chiapolini@physik.uzh.ch
+
+License: GNU General Public License version 2,
+         or (at your option) any later version.
+
+Importing ROOT takes seconds. The modules of lookat refer to ROOT through
+the proxy defined here, so ROOT is only imported when one of its names is
+actually used, not when lookat is imported.
+
+PyROOT keeps the global interpreter lock during calls into C++, so other
+python threads stop while e.g. a file is opened. release_gil() marks a
+method to be called without the lock.
+
+"""
+import importlib
+
+class _LazyROOT(object):
+    """ stands in for the ROOT module until one of its names is used """
+
+    def __init__(self):
+        self._module = None
+
+    def __repr__(self):
+        """ get informativ string representation """
+        if self._module == None:
+            return "<lazy ROOT module (not loaded)>"
+        return repr(self._module)
+
+    @property
+    def loaded(self):
+        """ True once ROOT has been imported """
+        return self._module != None
+
+    def __getattr__(self, name):
+        """ import ROOT (once) and get ''name'' from it """
+        if name.startswith("__"):
+            raise AttributeError(name)
+        if self._module == None:
+            self._module = importlib.import_module("ROOT")
+        return getattr(self._module, name)
+
+ROOT = _LazyROOT()
+
+def release_gil(method):
+    """ let other python threads run while ''method'' is executed
+
+    Parameters
+    ----------
+    method : method of a ROOT class
+        method to mark, e.g. ROOT.TTree.Draw (applies to all calls)
+
+    Returns
+    -------
+    released : Boolean
+        False if this version of PyROOT does not support it
+
+    """
+    released = False
+    # '__release_gil__' for cppyy based PyROOT, '_threaded' before
+    for flag in ["__release_gil__", "_threaded"]:
+        try:
+            setattr(method, flag, True)
+            released = True
+        except (AttributeError, TypeError):
+            pass
+    return released
@@ -0,0 +1,194 @@
+# pylint: disable-msg=E0611, C0103
+""" selections.py - evaluate selections once and reuse the entry lists
+
+This file is part of lookat
+
+Copyright 2013, Nicola Chiapolini, nicola.chiapolini@physik.uzh.ch
+
+License: GNU General Public License version 2,
+         or (at your option) any later version.
+
+A selection used a second time on the same tree is evaluated into a
+TEntryList, later reads with this selection only visit the listed entries.
+Evaluating the list costs an extra pass, so selections used only once (the
+usual ad-hoc cuts) are not stored. A selection "a && b" whose parts all
+have a list already is found by intersecting the lists, so new
+combinations of known cuts cost no pass over the tree. Trees not stored
+in a file are not cached.
+
+"""
+import hashlib
+from contextlib import contextmanager
+from lookat.lazyroot import ROOT
+from lookat.treeloop import tree_source
+
+def split_selection(select):
+    """ split ''select'' at the '&&' outside of any brackets
+
+    Parameters
+    ----------
+    select : string
+        selection to split
+
+    Returns
+    -------
+    parts : list of strings
+        parts of the selection, [select] if there is nothing to split
+
+    """
+    parts = []
+    depth = 0
+    start = 0
+    i = 0
+    while i < len(select):
+        if select[i] == "(":
+            depth += 1
+        elif select[i] == ")":
+            depth -= 1
+        elif depth == 0 and select[i:i+2] == "||":
+            return [select.strip()]
+        elif depth == 0 and select[i:i+2] == "&&":
+            parts.append(select[start:i].strip())
+            start = i+2
+            i += 1
+        i += 1
+    parts.append(select[start:].strip())
+    return parts
+
+class SelectionCache(object):
+    """ entry lists of selections, keyed by tree and selection text """
+
+    def __init__(self, directory=None, enabled=True):
+        """ create an empty cache
+
+        Parameters
+        ----------
+        directory : TDirectory or callable
+            directory to keep the entry lists in, e.g. the workspace, or a
+            function returning it when the first list is stored
+            (default: None, keep them in memory only)
+        enabled : Boolean
+            if False, get() creates no lists and returns None, set the
+            attribute to switch the cache off later (default: True)
+
+        """
+        self._directory = directory
+        self._lists = {}
+        self._seen = set()
+        self.enabled = enabled
+
+    def __repr__(self):
+        """ get informativ string representation """
+        return "<SelectionCache object ("+str(len(self._lists))+" lists)>"
+
+    def _get_directory(self):
+        """ get the directory to keep the entry lists in """
+        if callable(self._directory):
+            return self._directory()
+        return self._directory
+
+    @staticmethod
+    def key(tree, select):
+        """ get the key for ''select'' applied to ''tree'', None for trees
+        not stored in a file """
+        try:
+            source = tree_source(tree)
+        except (AttributeError, ReferenceError):
+            source = None
+        if source == None:
+            return None
+        return hashlib.sha1((repr(source)+"\n"+select).encode("utf-8")).hexdigest()
+
+    def _evaluate(self, tree, select, key):
+        """ evaluate ''select'' over the whole tree into an entry list """
+        name = "lookat_sel_"+key[:16]
+        old_list = tree.GetEntryList()
+        tree.SetEntryList(0)
+        try:
+            tree.Draw(">>"+name, select, "entrylist")
+        finally:
+            tree.SetEntryList(old_list)
+        elist = ROOT.gDirectory.Get(name)
+        if not elist:
+            return None
+        elist.SetDirectory(self._get_directory())
+        return elist
+
+    @staticmethod
+    def _intersect(elists, key):
+        """ get the entries contained in all lists of ''elists'' """
+        result = elists[0].Clone("lookat_sel_"+key[:16])
+        for elist in elists[1:]:
+            missing = result.Clone()
+            missing.Subtract(elist)
+            result.Subtract(missing)
+        return result
+
+    def get(self, tree, select, force=False):
+        """ get the entry list of ''select'', evaluated on second use
+
+        Parameters
+        ----------
+        tree : TTree or TChain
+            tree to apply the selection to
+        select : string
+            selection
+        force : Boolean
+            evaluate the list on first use, for callers needing it anyway
+            (default: False)
+
+        Returns
+        -------
+        elist : TEntryList or None
+            entries passing the selection, None for an empty selection, a
+            selection seen the first time, a tree not stored in a file, if
+            the selection can not be evaluated or the cache is disabled
+
+        """
+        select = select.strip()
+        if select == "" or not self.enabled:
+            return None
+        key = self.key(tree, select)
+        if key == None:
+            return None
+        if key not in self._lists:
+            part_keys = [self.key(tree, p) for p in split_selection(select)]
+            if len(part_keys) > 1 and \
+               all(k in self._lists for k in part_keys):
+                elist = self._intersect([self._lists[k] for k in part_keys],
+                                        key)
+                elist.SetDirectory(self._get_directory())
+            elif force or key in self._seen:
+                elist = self._evaluate(tree, select, key)
+            else:
+                self._seen.add(key)
+                return None
+            if elist == None:
+                return None
+            self._lists[key] = elist
+        return self._lists[key]
+
+    @contextmanager
+    def use(self, tree, select):
+        """ restrict ''tree'' to the entries passing ''select'' in a
+        with-statement
+
+        The selection still has to be applied (e.g. as weight), but only
+        the listed entries are visited.
+
+        """
+        elist = self.get(tree, select)
+        if elist == None:
+            yield tree
+            return
+        old_list = tree.GetEntryList()
+        tree.SetEntryList(elist)
+        try:
+            yield tree
+        finally:
+            tree.SetEntryList(old_list)
+
+    def clear(self):
+        """ forget all entry lists """
+        self._lists = {}
+        self._seen = set()
@@ -0,0 +1,1615 @@
+# pylint: disable-msg=E0611, W0602, W0611, W0614, C0103
+""" session.py - functions and global lists for interactive use
+
+This file is part of lookat
+
+Copyright 2013, Nicola Chiapolini, nicola.chiapolini@physik.uzh.ch
+
+License: GNU General Public License version 2,
+         or (at your option) any later version.
+
+Everything available after 'from lookat import *'. Importing this module
+loads ROOT; the lookat package only imports it on first access.
+
+The workspace file 'workspace.root' is no longer created on import and is
+no longer the current directory. New histograms are kept in memory (in
+gROOT), gWorkspace stays None until workspace() is called, e.g. to store
+the entry lists of gSelections. Scripts listing or writing gWorkspace
+should call workspace() and save histograms with save_objects().
+
+"""
+
+import atexit
+import glob
+import readline
+completer = readline.get_completer()
+from lookat.canvashandler import CanvasHandler
+from lookat.columnar import get_lookup, fill_weighted, iter_blocks
+from lookat.columnar import fill_columns, WeightedValues, BulkFiller
+from lookat.columnar import read_block, read_entries, sample_entries
+from lookat.treeloop import iter_entries
+from lookat.evallib import referenced_branches
+from lookat.weights import weight_formula
+from lookat.cache import HistCache
+from lookat.stats import StatsIndex, BranchStats
+from lookat.background import FillJob
+from lookat.fileio import expand_names, file_key, check_files, EntryIndex
+from lookat.fileio import walk_keys
+from lookat.treecache import configure_cache, cache_stats, enable_implicit_mt
+from lookat.catalog import get_catalog
+from lookat.snapshot import Snapshot, write_snapshot, load_snapshot
+from lookat.friends import join
+from lookat.selections import SelectionCache
+from ROOT import TFile, TChain, TTree
+from ROOT import TH1F, TH2F
+from ROOT import gDirectory, gROOT
+from ROOT import gPad
+from ROOT import TLatex
+from ROOT import kRed, kBlue, kGreen, kBlack
+try:
+# pylint: disable-msg=W0401
+    from lookat_helper import *
+# pylint: enable-msg=W0401
+except ImportError:
+    pass
+from math import log, exp, sqrt
+readline.set_completer(completer)
+
+gCanvs  = []
+gFiles  = []
+gHistos = []
+gTrees  = []
+gJobs   = []
+gCache  = HistCache()
+gStats  = StatsIndex()
+gEntries = EntryIndex()
+default_snapshot_buffer = 1000000
+
+TH1F.SetDefaultSumw2()
+TH2F.SetDefaultSumw2()
+gWorkspace = None
+
+def workspace():
+    """ get the workspace file, created when it is first needed
+
+    The workspace holds objects that should not be kept in memory, e.g. the
+    entry lists of gSelections. Creating it does not change gDirectory, so
+    histograms are not created in the workspace (see module description).
+
+    Returns
+    -------
+    the_file : TFile
+        the file 'workspace.root' (recreated in each session)
+
+    """
+    global gWorkspace
+    if gWorkspace == None:
+        dir_path = gDirectory.GetPath()
+        gWorkspace = TFile('workspace.root', 'recreate')
+        gROOT.cd(dir_path)
+    return gWorkspace
+
+gSelections = SelectionCache(workspace)
+
+def active_canvas():
+    """ get active canvas
+
+    Finde the CanvasHandler containing the active pad
+
+    """
+    cleanup()
+    active_name = gPad.GetCanvas().GetName()
+    for canv in gCanvs:
+        if canv.GetName() == active_name:
+            return canv
+
+def active_pad():
+    """ get active pad
+
+    Finde the PadHandler containing the active pad
+
+    """
+    cleanup()
+    active_name = gPad.GetName()
+    for canv in gCanvs:
+        for pad in canv.pads.itervalues():
+            if pad.GetName() == active_name:
+                return pad
+
+class RatioTHnF(object):
+    """ class for ratio histograms """
+
+    def __init__(self, h_num, h_denum, normalised):
+        """ create a ratio histogram
+
+        Creates containing the ratio of two input histograms
+        The input histograms are weighted with the respective number of entries
+
+        Parameters
+        ----------
+        h_num : THnF
+            histogram used for numerator
+        h_denum : THnF
+            histogram used for denumerator
+        normalised : Boolean
+            if True, the histograms are weighted to an area of 1
+
+        """
+        self._pads       = []
+        self._num        = h_num
+        self._denum      = h_denum
+        self._normalised = normalised
+        res_name = _get_unique_hname("ratio_{0}")
+        self._ratio = self._num.Clone(res_name)
+        try:
+            self.set_varinfo(self._num.var_info)
+        except AttributeError:
+            print "Warning: numerator histogram has no var_info attribute"
+            print "         use set_varinfo('var') to set manually."
+            self.set_varinfo(None)
+        if type(self._ratio) == TH2F:
+            self.get_content = self._get_content_2d
+        else:
+            self.get_content = self._get_content_1d
+        weight_num   = 1.0
+        weight_denum = 1.0
+        if self._normalised:
+            weight_num   = 1.0/h_num.GetSumOfWeights()
+            weight_denum = 1.0/h_denum.GetSumOfWeights()
+        self._ratio.Divide(h_num, h_denum, weight_num, weight_denum)
+        self.update_color()
+
+    @property
+    def var_info(self):
+        """ get var_info (variable filled) for this histogram
+
+        """
+        return self._ratio.var_info
+
+    def set_varinfo(self, varinfo):
+        """ set var_info
+
+        var_info should contain the string used to TTree.Draw() the histogram.
+
+        """
+        self._ratio.var_info = varinfo
+        self._var_names = []
+        if varinfo != None:
+            self._var_names = varinfo.split(':')[::-1]
+
+    def __repr__(self):
+        """ get informativ string representation """
+        out_string  = "<RatioTHnF object ("+self._num.GetName()+"/"
+        out_string += self._denum.GetName()+")>"
+        return out_string
+
+    def clean_pads(self):
+        """ remove dead PadHandler from the list of pads
+
+        """
+        for pad in self._pads:
+            try:
+                pad.GetName()
+            except AttributeError:
+                self._pads.remove(pad)
+
+    def Draw(self, draw_opts):
+        """ draw the ratio THnF and configure the layout
+
+        Draws the ratio THnF on the active pad. The active pad is stored and
+        the layout of uptimised for ratio plots.
+
+        Parameters
+        ----------
+        draw_opts : string
+            draw options for THnF.Draw()
+
+        """
+        self._ratio.Draw(draw_opts)
+        self._ratio.SetStats(0)
+
+        pad = active_pad()
+        if not pad in self._pads:
+            self._pads.append(pad)
+        if self._normalised:
+            pad.set_yrange(0, 2.1)
+        pad.SetGrid()
+        pad.Update()
+
+    def set_yrange(self, y_min, y_max):
+        """ set the y-range of this ratio THnF
+
+        Updates each pad containig this ratio THnF with the given y-range
+
+        Parameters
+        ----------
+        y_min : float
+            min value for the y axis
+        y_max : float
+            max value for the y axis
+
+        """
+        self.clean_pads()
+        for pad in self._pads:
+            pad.set_yrange(y_min, y_max)
+
+    def update_color(self):
+        """ update the line color of the ratio THnF
+        to match the one from the numerator THnF
+
+        """
+        self._ratio.SetLineColor( self._num.GetLineColor() )
+        self._ratio.SetMarkerColor( self._num.GetMarkerColor() )
+
+    def GetName(self):
+        """ get the name of the ratio THnF
+
+        """
+        return self._ratio.GetName()
+
+    def SetName(self, name):
+        """ get the name of the ratio THnF
+
+        """
+        return self._ratio.SetName(name)
+
+    def Write(self):
+        """ write the ratio TH1F or TH2F into the present directory
+
+        """
+        self._ratio.Write()
+
+    def Delete(self):
+        """ delete the ratio THnF
+
+        """
+        self._ratio.Delete()
+
+    @property
+    def bin_edges_x(self):
+        """ get the edges of all bins in this histogram
+
+        Returns
+        -------
+        edges : list
+            list containing the edges of all bins
+            e.g: [0,1,2,3,4,5] for [0,5] divided into 5 bins of equal width
+
+        """
+        return list(get_lookup(self._ratio).edges(0))
+
+    @property
+    def thnf(self):
+        """ get the TH1F/TH2F object for the ratio """
+        return self._ratio
+
+    def invalidate(self):
+        """ update the cached bins and contents after changing thnf directly
+
+        Changes of the number of entries, the sum of weights or the binning
+        are detected automatically.
+
+        """
+        get_lookup(self._ratio, refresh=True)
+
+    def get_content_batch(self, x, y=None):
+        """ get the content of the bins containing many points at once
+
+        Parameters
+        ----------
+        x : numpy array
+            x values of the points
+        y : numpy array
+            y values of the points, only for TH2F
+
+        Returns
+        -------
+        contents : numpy array
+            content of the bin containing each point
+
+        """
+        if y is None:
+            return get_lookup(self._ratio)(x)
+        return get_lookup(self._ratio)(x, y)
+
+    _get_content_docstring = """
+    Parameters
+    ----------
+    evt : TTree event
+        event to look up
+    tree : TTree where this event was comming from
+
+    Returns
+    -------
+    content : float
+        content of bin containing evt
+
+    """
+
+    def _get_content_1d(self, evt):
+        """ get content of bin containing the passed event
+
+        helper function for 1d histograms
+
+        """
+        # FindFixBin is faster than a lookup for a single point
+        return self._ratio.GetBinContent(
+                   self._ratio.FindFixBin(evt.__getattr__(self._var_names[0]))
+               )
+
+    def _get_content_2d(self, evt):
+        """ get content of bin containing the passed event
+
+        helper function for 2d histograms
+
+        """
+        var_x, var_y = self._var_names
+        return self._ratio.GetBinContent(self._ratio.FindFixBin(
+                   evt.__getattr__(var_x),
+                   evt.__getattr__(var_y),
+               ))
+
+    #pylint: disable-msg=E1101
+    _get_content_1d.__doc__ += _get_content_docstring
+    _get_content_2d.__doc__ += _get_content_docstring
+    #pylint: enable-msg=E1101
+
+
+def get_branch_list(names_only=True, tree=None, pattern=None):
+    """ get list of branches in tree
+
+    creates a python list with either the branch-names or branch-objects in
+    the tree. You could use tree.Print() as well, but that might be longer
+    then your output-buffer and goes to stdout directly. The names are taken
+    from the branch catalog of the tree, which is built on first use.
+
+    Parameters
+    ----------
+    names_only : boolean
+        create a list with branch names only (if True, default) or with the
+        branch objects (if False)
+    tree : TTree
+        create the list for this tree
+    pattern : string
+        shell pattern, e.g. "jet_*", to select branches from the full
+        hierarchy including sub-branches (default: None, all top-level
+        branches)
+
+    Returns
+    -------
+    branch_list : list of strings or TBranch
+        list with choosen info on branches
+
+    """
+    if tree == None:
+        tree = gTrees[-1]
+    catalog = get_catalog(tree)
+    if pattern == None:
+        branch_list = catalog.names(top_level=True)
+    else:
+        branch_list = catalog.glob(pattern)
+    if not names_only:
+        branch_list = [tree.GetBranch(name) for name in branch_list]
+    return branch_list
+
+def find_branch(name, tree=None):
+    """ get the branch names closest to ''name''
+
+    Names starting with ''name'' come first, followed by similar names
+    (e.g. with typos) from the whole hierarchy.
+
+    Parameters
+    ----------
+    name : string
+        (part of) the branch name to look for
+    tree : TTree
+        tree to search (default: gTrees[-1])
+
+    Returns
+    -------
+    names : list of strings
+        matching branch names
+
+    """
+    if tree == None:
+        tree = gTrees[-1]
+    catalog = get_catalog(tree)
+    names = catalog.prefix(name)
+    names += [n for n in catalog.fuzzy(name) if n not in names]
+    return names
+
+def heaviest_branches(n=20, tree=None):
+    """ print the branches taking up most space on disk
+
+    Parameters
+    ----------
+    n : int
+        number of branches to list (default: 20)
+    tree : TTree
+        tree to inspect (default: gTrees[-1])
+
+    Returns
+    -------
+    infos : list of BranchInfo
+        largest branch first
+
+    """
+    if tree == None:
+        tree = gTrees[-1]
+    infos = get_catalog(tree).heaviest(n)
+    print("{0:>12} {1:>12} {2:>6}  {3}".format("compressed", "in memory",
+                                               "ratio", "branch"))
+    for info in infos:
+        print("{0:>12} {1:>12} {2:>6.2f}  {3} [{4}]".format(
+            info.zip_bytes, info.tot_bytes, info.compression, info.name,
+            info.leaf_type))
+    return infos
+
+def branch_stats(var, tree=None):
+    """ get min, max, count and mean of a branch
+
+    The statistics are taken from gStats. Only if they are not known yet,
+    a single pass over the tree is made and the result is stored.
+
+    Parameters
+    ----------
+    var : string
+        branch name or expression
+    tree : TTree
+        tree to take events from (default: gTrees[-1])
+
+    Returns
+    -------
+    stats : BranchStats
+        statistics over all entries of tree
+
+    """
+    if tree == None:
+        tree = gTrees[-1]
+    return gStats.get(tree, var)
+
+def cleanup(include_histos = False):
+    """ remove unneeded entries from the global lists
+
+    Removes old entries from gCanvs left behind when a canvas window is closed.
+    If include_histos is True, removes all histograms that  are not conected
+    with any pad too.
+
+    Parameters
+    ----------
+    include_histos : boolean
+        if true, cleanup histograms too (default: False)
+
+    """
+    for canv in gCanvs:
+        if canv.canv == None:
+            gCanvs.remove(canv)
+    if include_histos:
+        orphaned = list(gHistos)
+        for canv in gCanvs:
+            for pad in canv.pads.itervalues():
+                for h in gHistos:
+                    # check if histogram is linked with this canvas
+                    # and remove it from ''orphaned'' if it is
+                    try:
+                        print("trying "+h.GetName())
+                        if pad.has_primitive( h.GetName() ):
+                            orphaned.remove(h)
+                    except ReferenceError:
+                        # probably a histogram created by a failed draw
+                        continue
+        for h in orphaned:
+            gHistos.remove(h)
+            try:
+                h.Delete()
+            except ReferenceError or AttributeError:
+                pass
+
+def add_file(name):
+    """ open root file 'name'
+
+    A new TFile-object for 'name' is created and added to gFiles. Files
+    already in gFiles are reused. With a glob pattern or a list of names,
+    all files are opened and checked before any of them is added.
+
+    Parameters
+    ----------
+    name : string or list of strings
+        name (and path) of the file to open, may contain wildcards
+
+    Returns
+    -------
+    the_file : TFile or list of TFiles
+        file-object, a list if several files were requested
+
+    """
+    global gFiles
+    names = expand_names(name)
+    open_files = dict((file_key(f.GetName()), f) for f in gFiles)
+    new_names = [n for n in names if file_key(n) not in open_files]
+    for new_name, the_file, _ in check_files(new_names, keep_open=True):
+        gFiles.append(the_file)
+        open_files[file_key(new_name)] = the_file
+        print(new_name+" added to gFiles.")
+    files = [open_files[file_key(n)] for n in names]
+    if isinstance(name, basestring) and not glob.has_magic(name):
+        return files[0]
+    return files
+
+def load(name, from_file=None, cache_size=None, cache_branches=None):
+    """ load TTree 'name'
+
+    Loads 'name' from the last added file (or from_file if specified) and
+    appends it to gTrees.
+
+    Parameters
+    ----------
+    name : string
+        name (and path) of the tree to load
+    from_file : TFile
+        file to get tree from (default: gFiles[-1])
+    cache_size : int
+        size of the read cache in bytes (default: treecache.default_cache_size)
+    cache_branches : list of strings
+        branches to cache (default: None, learn the branches used)
+
+    Returns
+    -------
+    the_tree : TTree
+        newly loaded tree-object
+
+    """
+    global gTrees
+    if from_file == None:
+        from_file = gFiles[-1]
+    gTrees.append( from_file.Get( name ) )
+    if gTrees[-1]:
+        configure_cache(gTrees[-1], cache_size, cache_branches)
+    return gTrees[-1]
+
+def create_chain(name, files, check=True, n_workers=None, cache_size=None, cache_branches=None):
+    """ create TChain for 'name'-trees and add files
+
+    A new chanin with the given name is created, all specified files are added
+    and the chain is appended to gTrees. Unless check is False, all files are
+    opened in parallel first, so unreadable files or files without the tree
+    are reported before the chain is used. The number of entries of each
+    file is taken from gEntries, only new or changed files are opened.
+
+    Parameters
+    ----------
+    name : string
+        name (and path) of the tree to load
+    files : string, list of strings or list of TFiles
+        files to add to chain, names may contain wildcards
+    check : Boolean
+        make sure all files not in gEntries contain the tree, and add their
+        number of entries to the index (default: True)
+    n_workers : int
+        number of worker processes checking the files
+        (default: fileio.default_n_workers)
+    cache_size : int
+        size of the read cache in bytes (default: treecache.default_cache_size)
+    cache_branches : list of strings
+        branches to cache (default: None, learn the branches used)
+
+    Returns
+    -------
+    the_tree : TChain
+        new chain-object
+
+    """
+    global gTrees
+    if not isinstance(files, basestring):
+        files = [f if isinstance(f, basestring) else f.GetName() for f in files]
+    files = expand_names(files)
+    counts = gEntries.lookup(files, name)
+    unknown = [f for f, n in zip(files, counts) if n == None]
+    if check and len(unknown) > 0:
+        results = check_files(unknown, name, n_workers=n_workers)
+        gEntries.store(unknown, name, [r[2] for r in results])
+        counts = gEntries.lookup(files, name)
+    chain = TChain(name, "")
+    for f, n in zip(files, counts):
+        if n == None:
+            chain.Add(f)
+        else:
+            chain.Add(f, n)
+    configure_cache(chain, cache_size, cache_branches)
+    gTrees.append( chain )
+    print("added new chain")
+    print("   "+str(files))
+    return gTrees[-1]
+
+def put_texts(title=None, xlabel=None, ylabel=None):
+    """ add title, x-label and y-label to active canvas
+
+    Change title, x-label and y-label for the active canvas.
+
+    Parameters
+    ----------
+    title : strings
+        new title for canvas
+    xlabel : strings
+        new x-label for histograms
+    ylabel : strings
+        new y-label for histograms
+
+    """
+    gCanvs[-1].put_texts(title, xlabel, ylabel)
+
+
+def canvas(name = ""):
+    """ create a new canvas
+
+    Creates a new CanvasHandler for a canvas with given name and appends the
+    handler to gCanvs. Additionally garbage-collects previously closed canvases
+
+    Returns
+    -------
+    the_canvas : TCanvas
+        new canvas-object
+
+    """
+    cleanup()
+    global gCanvs
+    gCanvs.append( CanvasHandler( name ) )
+    return gCanvs[-1]
+
+def th1f(h_name, binning):
+    """ create a new empty histogram
+
+    Creates an empty histogram with the given name and binning. SumW2 is called
+    to make uncertainties for weighted histograms are handled correctly.
+    The histogram is appended to gHistos.
+
+    Parameters
+    ----------
+    h_name: string
+        name for new histogram
+    binning : 3-tuple or list
+        if a tuple: (n_bins, lower_edge, upper_edge)
+        if a list:  edges of bins
+
+    Returns
+    -------
+    the_histo : TH1F
+        new th1f-object
+
+    """
+    if type(binning) == tuple:
+        gHistos.append(
+            TH1F(h_name, h_name, binning[0], binning[1], binning[2])
+        )
+    else:
+        try:
+            import numpy
+            bin_edges = numpy.array([e for e in binning], dtype=numpy.float64)
+            n_bins = len(bin_edges)-1
+            gHistos.append( TH1F(h_name, h_name, n_bins, bin_edges) )
+        except TypeError:
+            raise RuntimeError("histogram configuration not recognised!")
+    gHistos[-1].Sumw2()
+    return gHistos[-1]
+
+def sel(var, low, high, prefix=""):
+    """ create selection string for var in range (low, high)
+
+    returns the selection string prefix+"(low < var && var < high)", low and 
+    high willhave a precision of 2 decimal places, such that the string can 
+    be used as title too.
+
+    Parameters
+    ----------
+    var : string
+        variable to cut on
+    low : float
+        lower edge of selection range
+    high : float
+        higher edge of selection range
+    prefix : string
+        prefix for the string (e.g. &&)
+
+    Returns
+    -------
+    sel : string
+        selection string
+
+    """
+    return prefix+"({1:.2f} < {0:s} && {0:s} < {2:.2f})".format(var, low, high)
+
+def asel(var, low, high):
+    """ create additional selection string vor var in range (low, high)
+
+    uses sel() with the prefix set to "&&"
+
+    documentation for sel():
+    """
+    return sel(var, low, high, "&&")
+asel.__doc__ += "---\n"+sel.__doc__+"---"
+
+def normalise():
+    """ normalise histograms on active canvas
+
+    Scales all histograms on the active canvas to have an integral of 1. Adds
+    a corresponding y-axis label
+
+    """
+    for h in active_pad().get_primitives(TH1F):
+#        h.Sumw2()
+        h.Scale(1/h.Integral())
+    put_texts(ylabel = "normalised to unity")
+
+def legend(labels, colors=None, pos=None):
+    """ create a legend for the active canvas
+
+    Add a legend to the active canvas, labeling the histograms and changing
+    their color if specified. Makes sure ratio plots connected with the
+    relevant histograms get updated as well.
+
+    Parameters
+    ----------
+    labels : list of strings
+        labels for the histograms (in same order as they were drawn)
+    colors : list of TColors
+        line-colors to set for the histograms
+    pos : iterable with four float-entries
+        postion of the legend, (x_min, y_min, x_max, y_max) in [0, 1]
+
+    Returns
+    -------
+    the_legend : TLegend
+        new legend-object
+
+    """
+    l = active_canvas().add_legend(labels, colors, pos)
+    for h in gHistos:
+        if type(h) == RatioTHnF:
+            h.update_color()
+    return l
+
+def get_legend():
+    """ get legend of active canvas
+
+    Returns
+    -------
+    the_legend : TLegend
+        legend-object of active canvas
+
+    """
+    return active_canvas().legend
+
+def _get_unique_hname(h_name):
+    """ get a unique histogram name based on h_name
+
+    Parameters
+    ----------
+    h_name : string
+        base for histogram name. {0} will be replaced by a unique number.
+        If the pattern is missing, the number will be appended at the end.
+
+    Returns
+    -------
+    name : string
+        histogram name that does not exist in gDirectory yet
+
+    """
+    if h_name.find('{0}') == -1:
+        h_name += '_{0}'
+    n = len(gHistos)
+    while True:
+        name = h_name.format(n)
+        if type(gDirectory.Get(name)) != TH1F:
+            break
+        n += 1
+    return name
+
+def _prepare_drawopts(n_dim = 1, pad = None):
+    """ determine correct drawing option
+
+    if the pad has a 1D-histogram, add further 1D histograms to the
+    existing axes. Otherwise draw new axes.
+
+    Parameters
+    ----------
+    n_dim : int
+        dimensions of the new histogram
+    pad : PadHandler
+        pad the histogram will be drawn on (default: active pad)
+
+    Returns
+    -------
+    draw_opts : string
+        draw options for the Draw() functions
+
+    """
+    if pad == None:
+        pad = active_pad()
+    if n_dim == 2:
+        draw_opts = "colz"
+    else:
+        draw_opts = "same"
+        try:
+            pad.get_primitives(TH1F).next()
+        except StopIteration:
+            draw_opts = "Ep"
+    return draw_opts
+
+def _lookup(histo):
+    """ get the BinLookup for a TH1F, TH2F or RatioTHnF """
+    try:
+        return get_lookup(histo.thnf)
+    except AttributeError:
+        return get_lookup(histo)
+
+def _weighted_select(select, weight):
+    """ combine ''select'' with a lookup weight from histogram ''weight'' """
+    if select == "":
+        return weight_formula(weight)
+    return "("+select+")*"+weight_formula(weight)
+
+def _label_axes(var):
+    """ put the axis labels for a histogram of ''var'' on the active canvas """
+    texts = var.split(':')
+    if len(texts) == 1:
+        put_texts(xlabel=texts[0])
+    elif len(texts) == 2:
+        put_texts(xlabel=texts[1], ylabel=texts[0])
+    else:
+        put_texts(xlabel=var)
+
+def _book_histogram(name, n_dim, h_cfg, buffer_size):
+    """ create an empty histogram for a configuration string
+
+    Parameters
+    ----------
+    name : string
+        name for new histogram
+    n_dim : int
+        dimensions of the new histogram
+    h_cfg : string
+        histogram configuration as used by TTree.Draw(), e.g. "(40,0,10)"
+        or "(40,0,10,20,-1,1)" for 2D. If the range is missing, the
+        histogram collects buffer_size entries to find a range.
+    buffer_size : int
+        number of entries buffered to find an automatic range
+
+    Returns
+    -------
+    the_histo : TH1F or TH2F
+        new histogram-object
+
+    """
+    cfg = []
+    if h_cfg != None:
+        cfg = [float(v) for v in h_cfg.strip().strip("()").split(",")
+               if v.strip() != ""]
+    if n_dim == 1:
+        cfg += [40, 0, 0][len(cfg):]
+        h = TH1F(name, name, int(cfg[0]), cfg[1], cfg[2])
+        auto_range = cfg[1] >= cfg[2]
+    else:
+        cfg += [40, 0, 0, 40, 0, 0][len(cfg):]
+        h = TH2F(name, name, int(cfg[0]), cfg[1], cfg[2],
+                             int(cfg[3]), cfg[4], cfg[5])
+        auto_range = cfg[1] >= cfg[2] or cfg[4] >= cfg[5]
+    h.Sumw2()
+    if auto_range:
+        try:
+            h.SetCanExtend(TH1F.kAllAxes)
+        except AttributeError:
+            h.SetBit(TH1F.kCanRebin)
+        h.SetBuffer(buffer_size)
+    return h
+
+def _start_preview(h, tree, exprs, select, preview, draw_opts=None, func=None):
+    """ fill a sample into ''h'', draw it and refine it in the background
+
+    Parameters
+    ----------
+    h : TH1F or TH2F
+        empty histogram to fill
+    tree : TTree
+        tree to take events from
+    exprs : list of strings (TFormula)
+        values to fill, one for 1D, two (x, y) for 2D histograms
+    select : string
+        selection/weight to appy
+    preview : int or tuple
+        number of entries in the sample or tuple (mode, n) with mode
+        "first", "stride" or "random"
+    draw_opts : string
+        draw option, leave None to get smart choice
+    func : callable
+        turns the columns into (values, weights, ...), select is used as
+        selection only (default: None, fill exprs directly)
+
+    """
+    global gJobs
+    mode, n_sample = "first", preview
+    if type(preview) == tuple:
+        mode, n_sample = preview
+    n_total = int(tree.GetEntries())
+    n_sample = min(n_sample, n_total)
+    read_exprs = list(exprs)
+    if func == None and select != "":
+        read_exprs.append(select)
+    first, entries = n_sample, None
+    if mode == "first":
+        columns = read_block(tree, read_exprs, select, 0, n_sample)
+    else:
+        first, entries = 0, sample_entries(n_total, n_sample, mode)
+        columns = read_entries(tree, read_exprs, select, entries)
+    if func != None:
+        values, weights = func(columns)[:2]
+        fill_columns([h], [values], weights)
+    else:
+        weights = None
+        if select != "":
+            weights = columns.pop()
+        fill_columns([h], columns, weights)
+    # keep the buffer, an automatic range is only fixed once it is full
+    h.BufferEmpty(0)
+    ### show the sample
+    cleanup()
+    if len(gCanvs) == 0:
+        canvas()
+    canv = gCanvs[-1]
+    canv.cd()
+    if draw_opts == None:
+        draw_opts = _prepare_drawopts(h.GetDimension())
+    h.Draw(draw_opts)
+    _label_axes(h.var_info)
+    label = TLatex(0.55, 0.95, "")
+    label.SetNDC()
+    label.SetTextSize(0.03)
+    label.Draw()
+    h.preview_label = label
+
+    def show_progress(job):
+        """ update the fraction shown on the canvas (in the main thread) """
+        if job.progress < 1:
+            label.SetTitle("preview: {0:.1%} of entries".format(job.progress))
+        else:
+            label.SetTitle("")
+        h.BufferEmpty(0)
+        canv.canv.Modified()
+        canv.Update()
+
+    job = FillJob(h, tree, exprs, select, show_progress, func=func,
+                  first=first, exclude=entries, on_block=show_progress)
+    show_progress(job)
+    gJobs.append(job)
+    job.start()
+
+def _fill_snapshot(h, snap, exprs, select, weight=None):
+    """ fill ''exprs'' from a snapshot into ''h''
+
+    Parameters
+    ----------
+    h : TH1F or TH2F
+        histogram to fill
+    snap : Snapshot
+        snapshot to take the entries from
+    exprs : list of strings (TFormula)
+        values to fill, one for 1D, two (x, y) for 2D histograms
+    select : string
+        selection/weight to appy
+    weight : TH1F, TH2F or RatioTHnF
+        histogram used to weight the events (default: None)
+
+    """
+    read_exprs = list(exprs)
+    if select != "":
+        read_exprs.append(select)
+    lookup = None
+    if weight != None:
+        lookup = _lookup(weight)
+        read_exprs.extend(weight.var_info.split(':')[::-1])
+    for columns in snap.iter_blocks(read_exprs, select):
+        weights = None
+        if select != "":
+            weights = columns[len(exprs)]
+        if lookup != None:
+            lookup_weights = lookup(*columns[len(columns)-lookup.n_dim:])
+            if weights is None:
+                weights = lookup_weights
+            else:
+                weights = weights*lookup_weights
+        fill_columns([h], columns[:len(exprs)], weights)
+    h.BufferEmpty(1)
+
+def draw(var, select="", h_name="myHist_{0}", h_cfg=None, tree=None, draw_opts=None, weight=None, cache=False, preview=None):
+    """ create a histogram for given variable ''var''
+
+    Creates a canvas if non exists. If this will be the first histogram on the
+    active canvas, create axis. Otherwise draw histogram into the existing
+    axis.
+    If a new histogram is created, it is appended to gHistos.
+
+    Parameters
+    ----------
+    var : string
+        variable to plot, the root syntax of var1:var2 can be used to create
+        2d histograms
+    select : string
+        selection/weight to appy, once used a second time the entries passing
+        are kept in gSelections for later draws (turn off with
+        gSelections.enabled = False)
+        (default: "")
+    h_name : string
+        name of histogram to fill. If present a '{0}' pattern will be replaced
+        by a unique number. If a histogram 'h_name' exists already, it will be
+        replaced. To append to an existing histogram start the name with '+'.
+        ( default: "myHist_{0}" )
+    h_cfg : string
+        histogram configuration as used by TTree.Draw() ( default: "(40)" )
+        Root might decide to ignore this setting (e.g. for variables with
+        only a few distinct values.)
+    tree : TTree or Snapshot
+        tree to take events from (default: gTrees[-1])
+    draw_opts : string
+        draw option passed on to draw command, leave None to get smart choice
+    weight : TH1F, TH2F or RatioTHnF
+        histogram used to weight the events, the content of the bin
+        containing each event is looked up in compiled code (default: None)
+    cache : Boolean
+        if True, reuse a histogram filled in an earlier session from the
+        same files and store new histograms in gCache. Appending to an
+        existing histogram, trees with friends or an entry list set and
+        weight strings from weight_formula() always bypass the cache.
+        (default: False)
+    preview : int or tuple
+        fill a sample first and draw it at once, then keep refining the
+        histogram in the background (see gJobs[-1]). Either the number of
+        entries to start with (taken from the beginning), or a tuple
+        (mode, n) with mode "first", "stride" or "random". Without a range
+        in h_cfg, the range is chosen from the first tree.GetEstimate()
+        values filled, for "stride" and "random" these are not the same as
+        for draw() if more entries pass the selection. (default: None)
+
+    Returns
+    -------
+    the_histo : TH1F or TH2F
+        new histogram-object
+
+    """
+    global gHistos, gCanvs, gTrees
+    cleanup()
+    if len(gCanvs) == 0:
+        canvas()
+    gCanvs[-1].cd()
+    ### check dimensions
+    n_dim = var.count(':')+1
+    if n_dim > 2:
+        raise NotImplementedError("draw() supports 1- and 2-D histograms only")
+    ### prepare histogram binning
+    if h_cfg == None:
+        if n_dim == 1:
+            h_cfg = "(40)"
+        elif n_dim == 2:
+            h_cfg = ""
+    if h_name[0] == "+":
+        h_cfg = ""
+    ### prepare name-string for Draw methode
+    name = h_name
+    if h_name.find('{0}') != -1:
+        name = _get_unique_hname(h_name)
+    ### prepare draw option
+    if draw_opts==None:
+        draw_opts = _prepare_drawopts(n_dim)
+    ### draw
+    if tree == None:
+        tree = gTrees[-1]
+    ### snapshot: fill from the mapped columns, no ROOT I/O
+    if isinstance(tree, Snapshot):
+        if name[0] == "+":
+            h = gDirectory.Get(name[1:])
+        else:
+            h = _book_histogram(name, n_dim, h_cfg,
+                                min(len(tree), default_snapshot_buffer))
+            gHistos.append(h)
+        _fill_snapshot(h, tree, var.split(':')[::-1], select, weight)
+        h.Draw(draw_opts)
+        h.var_info = var
+        h.SetMarkerStyle(20)
+        _label_axes(var)
+        return h
+    ### preview: fill a sample first, refine in the background
+    if preview != None:
+        if name[0] == "+":
+            raise ValueError("preview can not append to an existing histogram")
+        if weight != None:
+            select = _weighted_select(select, weight)
+        h = _book_histogram(name, n_dim, h_cfg, int(tree.GetEstimate()))
+        h.var_info = var
+        h.SetMarkerStyle(20)
+        gHistos.append(h)
+        _start_preview(h, tree, var.split(':')[::-1], select, preview, draw_opts)
+        return h
+    ### look up cache
+    key = None
+    if cache and name[0] != "+" and draw_opts.lower().find("prof") == -1 \
+       and not tree.GetListOfFriends():
+        weight_digest = ""
+        if weight != None:
+            weight_digest = _lookup(weight).digest()
+        key = gCache.key(tree, var, select, h_cfg, weight_digest)
+        h = None
+        if key != None:
+            h = gCache.get(key, name)
+        if h != None:
+            h.Draw(draw_opts)
+            gHistos.append(h)
+            h.var_info = var
+            h.SetMarkerStyle(20)
+            _label_axes(var)
+            return h
+    with gSelections.use(tree, select):
+        if weight != None:
+            select = _weighted_select(select, weight)
+        tree.Draw(var+'>>'+name+h_cfg, select, draw_opts)
+    ### store histogram
+    if name[0] != "+":
+        h = gDirectory.Get(name)
+        gHistos.append(h)
+        if key != None and h:
+            gCache.put(key, h)
+    else:
+        h = gDirectory.Get(name[1:])
+    h.var_info = var
+    h.SetMarkerStyle(20)
+    _label_axes(var)
+    return h
+
+def draw_many(var_list, select="", h_name="myHist_{0}", h_cfg=None, tree=None, weight=None):
+    """ create histograms for several variables in a single pass
+
+    Books one histogram per variable, fills all of them in one pass over
+    the tree and draws the histograms on the pads of one new canvas once
+    the pass has finished. The histograms are appended to gHistos.
+
+    Parameters
+    ----------
+    var_list : list of strings
+        variables to plot, the root syntax of var1:var2 can be used to create
+        2d histograms
+    select : string
+        selection/weight to appy (default: "")
+    h_name : string
+        name of the histograms. A '{0}' pattern will be replaced by a unique
+        number, it is required for more than one variable.
+        ( default: "myHist_{0}" )
+    h_cfg : string or dict
+        histogram configuration as used by TTree.Draw(), e.g. "(40,0,10)".
+        If a dict is passed, the configuration is looked up by variable.
+        Without range, the range is chosen automatically.
+        ( default: "(40)" )
+    tree : TTree
+        tree to take events from (default: gTrees[-1])
+    weight : TH1F, TH2F or RatioTHnF
+        histogram used to weight the events (default: None)
+
+    Returns
+    -------
+    histos : list of TH1F or TH2F
+        new histogram-objects, in the order of var_list
+
+    """
+    global gHistos, gCanvs, gTrees
+    if len(var_list) > 1 and h_name.find('{0}') == -1:
+        raise ValueError("h_name needs a '{0}' pattern for several variables")
+    if tree == None:
+        tree = gTrees[-1]
+    elist_select = select
+    if weight != None:
+        select = _weighted_select(select, weight)
+    buffer_size = int(tree.GetEstimate())
+    histos = []
+    exprs = []
+    for var in var_list:
+        n_dim = var.count(':')+1
+        if n_dim > 2:
+            raise NotImplementedError("draw_many() supports 1- and 2-D histograms only")
+        cfg = h_cfg
+        if type(h_cfg) == dict:
+            cfg = h_cfg.get(var)
+        name = h_name
+        if h_name.find('{0}') != -1:
+            name = _get_unique_hname(h_name)
+        h = _book_histogram(name, n_dim, cfg, buffer_size)
+        h.var_info = var
+        gHistos.append(h)
+        histos.append(h)
+        exprs.extend(var.split(':')[::-1])
+    if select != "":
+        exprs.append(select)
+    all_stats = [BranchStats() for _ in exprs]
+    with gSelections.use(tree, elist_select):
+        for columns in iter_blocks(tree, exprs, select):
+            weights = None
+            if select == "":
+                for stats, values in zip(all_stats, columns):
+                    stats.update(values)
+            else:
+                weights = columns.pop()
+            fill_columns(histos, columns, weights)
+    if select == "":
+        for expr, stats in zip(exprs, all_stats):
+            gStats.store(tree, expr, stats)
+    ### draw after the pass has finished, one pad per histogram
+    canv = canvas()
+    for h, pad_name in zip(histos, canv.divide(len(histos))):
+        h.BufferEmpty(1)
+        h.SetMarkerStyle(20)
+        pad = canv.pads[pad_name]
+        pad.cd()
+        h.Draw(_prepare_drawopts(h.GetDimension()))
+        texts = h.var_info.split(':')
+        pad.set_xlabel(texts[-1])
+        if len(texts) == 2:
+            pad.set_ylabel(texts[0])
+        pad.Update()
+    canv.cd()
+    return histos
+
+def draw_async(var, select="", h_name="myHist_{0}", h_cfg=None, tree=None, canv=None, weight=None):
+    """ create a histogram for ''var'' in the background
+
+    Returns immediately with a job handle. A background thread reads the
+    values from its own copy of the tree, they are filled into the histogram
+    in the main thread, from the event loop of the interactive session (or
+    by job.wait() in scripts). Once all entries are processed, the histogram
+    is drawn on ''canv''. The histogram is appended to gHistos and the job
+    to gJobs right away. Starting a job makes TTree.Draw release the python
+    interpreter lock for the rest of the session (see lookat.background).
+
+    Parameters
+    ----------
+    var : string
+        variable to plot, the root syntax of var1:var2 can be used to create
+        2d histograms
+    select : string
+        selection/weight to appy (default: "")
+    h_name : string
+        name of histogram to fill. If present a '{0}' pattern will be replaced
+        by a unique number. ( default: "myHist_{0}" )
+    h_cfg : string
+        histogram configuration as used by TTree.Draw(), e.g. "(40,0,10)".
+        Without range, the range is chosen automatically. ( default: "(40)" )
+    tree : TTree
+        tree to take events from (default: gTrees[-1])
+    canv : CanvasHandler
+        canvas to draw on when done (default: gCanvs[-1])
+    weight : TH1F, TH2F or RatioTHnF
+        histogram used to weight the events (default: None)
+
+    Returns
+    -------
+    the_job : FillJob
+        handle to follow the progress (print it), wait() or cancel()
+
+    """
+    global gHistos, gCanvs, gTrees, gJobs
+    n_dim = var.count(':')+1
+    if n_dim > 2:
+        raise NotImplementedError("draw_async() supports 1- and 2-D histograms only")
+    cleanup()
+    if canv == None:
+        if len(gCanvs) == 0:
+            canvas()
+        canv = gCanvs[-1]
+    if tree == None:
+        tree = gTrees[-1]
+    if weight != None:
+        select = _weighted_select(select, weight)
+    name = h_name
+    if h_name.find('{0}') != -1:
+        name = _get_unique_hname(h_name)
+    h = _book_histogram(name, n_dim, h_cfg, int(tree.GetEstimate()))
+    h.var_info = var
+    h.SetMarkerStyle(20)
+    gHistos.append(h)
+
+    def draw_result(job):
+        """ draw the filled histogram (called in the main thread) """
+        canv.cd()
+        job.histogram.Draw(_prepare_drawopts(n_dim, canv.pads["main"]))
+        texts = var.split(':')
+        if n_dim == 1:
+            canv.put_texts(xlabel=texts[0])
+        else:
+            canv.put_texts(xlabel=texts[1], ylabel=texts[0])
+
+    job = FillJob(h, tree, var.split(':')[::-1], select, draw_result)
+    gJobs.append(job)
+    return job.start()
+
+def draw_ratio(h_num = None, h_denum = None, canv = None, normalised = True):
+    """ create a ratio plot
+
+    Parameters
+    ----------
+    h_num : THnF
+        histogram to use for numerator
+    h_denum : THnF
+        histogram to use for denumerator
+    canv : CanvasHandler
+        canvas where ratio should be draw on
+    normalised : Boolean
+        if True, the histograms are weighted to an area of 1 (default: True)
+
+    Returns
+    -------
+    the_histo : RatioTHnF
+        new ratio-object
+
+    """
+    global gPad
+    old_pad = gPad.GetPad(0)
+    if h_num == None:
+        h_num = gHistos[-1]
+    if h_denum == None:
+        h_denum = gHistos[-2]
+    if canv == None:
+        canv = active_canvas()
+    draw_opts = "same"
+    if canv.cd_ratio():  # cd_ratio() returns true if new pad was created
+        draw_opts = "Ep"
+    if type(h_num) == TH2F:
+        canv.full_pad("ratio")
+        draw_opts = "colz"
+    ratio = RatioTHnF(h_num, h_denum, normalised)
+    ratio.Draw(draw_opts)
+    gHistos.append(ratio)
+    canv.canv.cd()
+    gPad.Update()
+    old_pad.cd()
+    return ratio
+
+def draw_weighted(var, h_weight, select="", h_cfg=None, inverse_weight=False, tree=None, columnar=False, n_workers=None, preview=None):
+    """ create a 1D histogram for ''var'' corrected for an efficiency effect
+
+    creates a histogram for ''var'' and weight each event with the inverse of
+    its efficiency. The histogram name is fixed as "h_<<var>>_<<nr>>".
+    In columnar mode, the variables are read in large blocks into numpy
+    arrays and the weights are looked up for the whole block at once. The
+    resulting histogram is identical to the one from the event loop.
+
+    Parameters
+    ----------
+    var : string
+        name of tree-branch to plot
+    h_weight : RatioTHnF
+        histogram used to look up weights
+    select : string
+        selection to appy (default: "")
+    inverse_weight : Boolean
+        if set to True, events will be weighted with 1/weight (default: False)
+    h_cfg : string
+        histogram configuration as used by TTree.Draw()
+        ( default: same as h_weight, if same variable
+                   40 bins, auto range otherwise)
+    tree : TTree or Snapshot
+        tree to take events from (default: gTrees[-1])
+    columnar : Boolean
+        if set to True, fill the histogram block-wise with numpy instead of
+        looping over the events in python (default: False)
+    n_workers : int
+        number of worker processes reading the tree in parallel, implies
+        columnar mode (default: None, process serially)
+    preview : int or tuple
+        fill a sample first and draw it at once, then keep refining the
+        histogram in the background (see gJobs[-1]). Either the number of
+        entries to start with (taken from the beginning), or a tuple
+        (mode, n) with mode "first", "stride" or "random". (default: None)
+
+    Returns
+    -------
+    the_histo : TH1F
+        new histogram-object
+
+    """
+    if tree == None:
+        tree = gTrees[-1]
+    if h_cfg == None:
+        if h_weight.var_info == var:
+            h_cfg = h_weight.bin_edges_x
+        else:
+            if isinstance(tree, Snapshot):
+                x_min, x_max = tree.range(var)
+            else:
+                x_min, x_max = gStats.range(tree, var)
+            if x_min == None:
+                # no entries, any range will do
+                x_min, x_max = 0., 1.
+            h_cfg = ( 40, x_min, x_max )
+    name = _get_unique_hname("h_"+var+"_{0}")
+    h = th1f( name, h_cfg )
+    h.var_info = var
+    put_texts(xlabel=var)
+    if preview != None:
+        lookup = get_lookup(h_weight.thnf)
+        lookup_vars = h_weight.var_info.split(':')[::-1]
+        _start_preview(h, tree, [var]+lookup_vars, select, preview,
+                       func=WeightedValues(lookup, inverse_weight))
+        return h
+    if isinstance(tree, Snapshot):
+        lookup = get_lookup(h_weight.thnf)
+        lookup_vars = h_weight.var_info.split(':')[::-1]
+        func = WeightedValues(lookup, inverse_weight)
+        n_skipped = 0
+        for columns in tree.iter_blocks([var]+lookup_vars, select):
+            values, weights, n_zero = func(columns)
+            fill_columns([h], [values], weights)
+            n_skipped += n_zero
+        if n_skipped > 0:
+            print("Warning: "+str(n_skipped)+" events with 0 efficiency, skipped!")
+    elif columnar or n_workers != None:
+        lookup = get_lookup(h_weight.thnf)
+        lookup_vars = h_weight.var_info.split(':')[::-1]
+        if n_workers == None or n_workers <= 1:
+            with gSelections.use(tree, select):
+                n_skipped = fill_weighted(h, var, lookup, lookup_vars, tree,
+                                          select, inverse_weight)
+        else:
+            n_skipped = fill_weighted(h, var, lookup, lookup_vars, tree,
+                                      select, inverse_weight,
+                                      n_workers=n_workers)
+        if n_skipped > 0:
+            print("Warning: "+str(n_skipped)+" events with 0 efficiency, skipped!")
+    else:
+        branches = referenced_branches(tree, [var, h_weight.var_info])
+        elist = gSelections.get(tree, select, force=True)
+        # bins are looked up per buffer, not per event
+        names = [var]+h_weight.var_info.split(':')[::-1]
+        func = WeightedValues(get_lookup(h_weight.thnf), inverse_weight)
+        with BulkFiller(h, func=func, n_columns=len(names)) as filler:
+            for evt in iter_entries(tree, select, branches, elist):
+                filler.fill(*[evt.__getattr__(n) for n in names])
+        if filler.n_skipped > 0:
+            print("Warning: "+str(filler.n_skipped)+" events with 0 efficiency, skipped!")
+    ### ensure canvas after the loop has finished
+    cleanup()
+    if len(gCanvs) == 0:
+        canvas()
+    gCanvs[-1].cd()
+    do = _prepare_drawopts(1)
+    h.Draw(do)
+    return h
+
+def draw_corrected(var, h_eff, select="", h_cfg=None, tree=None, columnar=False, n_workers=None):
+    """ create a 1D histogram for ''var'' corrected for an efficiency effect
+
+    Wrapper around draw_weighted, with inverse_weight==True
+
+    """
+    return draw_weighted(var, h_eff, select=select, h_cfg=h_cfg, inverse_weight=True, tree=tree, columnar=columnar, n_workers=n_workers)
+
+def create_weight_string(histo):
+    """ create a weight string based on passed histogram
+
+    creates a string that can be used in TTree.Draw() to weight the events
+    according to the content of the passed histogram. The string has one
+    term per bin and can be used outside of lookat. Within lookat, passing
+    the histogram as weight to draw() is much faster.
+
+    Parameters
+    ----------
+    histo : TH1F
+        histogram to take weights from
+
+    Returns
+    -------
+    output : string
+        string for use as weight in TTree.Draw()
+
+    """
+    output = "("
+    tmpl_str = "{weight:.3f}*({low:.2f} <= {var} && {var} < {high:.2f})+"
+    for i in range(1, histo.GetNbinsX()+1):
+        output += tmpl_str.format(weight=histo.GetBinContent(i),
+                                  low=histo.GetBinLowEdge(i),
+                                  high=histo.GetBinLowEdge(i+1),
+                                  var=histo.var_info)
+    return output[:-1]+")"
+
+def snapshot(var_list, select="", path="snapshot", tree=None, names=None):
+    """ store the selected values of all variables as numpy files
+
+    The values are read in one pass and written uncompressed, one .npy file
+    per variable. The returned snapshot (or load_snapshot(path) in a later
+    session) can be passed as tree to draw() and draw_weighted().
+
+    Parameters
+    ----------
+    var_list : list of strings
+        variables to store
+    select : string
+        selection to appy (default: "")
+    path : string
+        directory to write to (default: "snapshot")
+    tree : TTree
+        tree to take events from (default: gTrees[-1])
+    names : list of strings
+        names of the columns, plain identifiers can be used in expressions
+        (default: var_list)
+
+    Returns
+    -------
+    the_snapshot : Snapshot
+        memory-mapped columns
+
+    """
+    if tree == None:
+        tree = gTrees[-1]
+    snap = write_snapshot(tree, var_list, path, select, names)
+    print(str(len(snap))+" entries written to "+path)
+    return snap
+
+def purge_cache():
+    """ remove all histograms stored in gCache
+
+    Histograms are only cached by draw(..., cache=True).
+
+    """
+    gCache.purge()
+
+def save_objects(filename, objects=None, option="recreate"):
+    """ save a set of root objects into a file
+
+    saves all objects in the passed list into the given root file.
+
+    Parameters
+    ----------
+    filename : string
+        the filename to use (including extension)
+    objects : list or single object
+        root objects to save (default: gHistos)
+        all objects musts provide a Write() method.
+    option : string
+        option passed as 2nd argument to the TFile constructor (default: "new")
+    """
+    if objects == None:
+        objects = gHistos
+    elif not type(objects) == list:
+        objects = [objects]
+    outfile = TFile(filename, option)
+    assert outfile.IsWritable(), filename+" is not writable"
+    for h in objects:
+        h.Write()
+    outfile.Close()
+
+def lstree(on_file = None, max_depth=None, class_name=None, name=None):
+    """ print full directory tree of a file
+
+    prints the content of the file and all its directories. Only the key
+    headers are read and each key is printed as soon as it is found.
+
+    Parameters
+    ----------
+    on_file : TFile
+        file to process (default: gFiles[-1])
+    max_depth : int
+        do not descend further than this many levels (default: None, all)
+    class_name : string
+        shell pattern, e.g. "TH1*", to list matching classes only
+        (default: None, all)
+    name : string
+        shell pattern to list matching names only (default: None, all)
+
+    """
+    if on_file == None:
+        on_file = gFiles[-1]
+    for key in walk_keys(on_file, max_depth, class_name, name):
+        print("{0}{1:<12} {2};{3}  {4} bytes ({5} on disk)".format(
+            "  "*key.depth, key.class_name, key.name, key.cycle,
+            key.obj_bytes, key.zip_bytes))
+
+def exit_handler():
+    """ prevent segfault from ROOT when deleting pads """
+    cleanup()
+    for c in gCanvs:
+        c.Close()
+    print 'GoodBye!'
+atexit.register(exit_handler)
@@ -0,0 +1,230 @@
+# pylint: disable-msg=E0611, C0103
+""" snapshot.py - selected tree columns stored as memory-mapped numpy files
+
+This file is part of lookat
+
+Copyright 2013, Nicola Chiapolini, nicola.chiapolini@physik.uzh.ch
+
+License: GNU General Public License version 2,
+         or (at your option) any later version.
+
+A snapshot is a directory with one uncompressed .npy file per column and a
+json file describing the columns. Once written, the selected entries can be
+processed again without any ROOT I/O: the files are memory-mapped and only
+the pages actually used are read.
+
+"""
+import os
+import re
+import json
+import numpy
+from numpy.lib.format import open_memmap
+from lookat.columnar import iter_blocks
+from lookat.evallib import Columns, prepare_eval, numpy_formula
+from lookat.evallib import _tmath_namespace
+from lookat.treeloop import tree_source
+
+default_block_size = 1000000
+_meta_name = "columns.json"
+
+def write_snapshot(tree, exprs, path, select="", names=None, block_size=None):
+    """ write the selected values of ''exprs'' to ''path'' in one pass
+
+    Parameters
+    ----------
+    tree : TTree
+        tree to take events from
+    exprs : list of strings (TFormula)
+        values to store, one column each
+    path : string
+        directory to write to, created if needed
+    select : string
+        selection to appy (default: "")
+    names : list of strings
+        names of the columns in the snapshot, use plain identifiers to
+        refer to them in expressions later (default: exprs)
+    block_size : int
+        number of entries read per step (default: columnar default)
+
+    Returns
+    -------
+    snapshot : Snapshot
+        the new snapshot, memory-mapped
+
+    """
+    if names == None:
+        names = list(exprs)
+    if not os.path.isdir(path):
+        os.makedirs(path)
+    files = ["col_{0}.npy".format(i) for i in range(len(exprs))]
+    raw_files = [open(os.path.join(path, f+".raw"), "wb") for f in files]
+    n_rows = 0
+    try:
+        for columns in iter_blocks(tree, exprs, select, block_size):
+            for out_file, values in zip(raw_files, columns):
+                values.astype(numpy.float64).tofile(out_file)
+            n_rows += len(columns[0])
+    finally:
+        for out_file in raw_files:
+            out_file.close()
+    ### add the header, now that the length is known
+    for f in files:
+        raw_path = os.path.join(path, f+".raw")
+        array = open_memmap(os.path.join(path, f), "w+", numpy.float64,
+                            (n_rows,))
+        if n_rows > 0:
+            array[:] = numpy.memmap(raw_path, numpy.float64, "r",
+                                    shape=(n_rows,))
+        array.flush()
+        del array
+        os.remove(raw_path)
+    name, source_files = tree_source(tree) or (tree.GetName(), ())
+    meta = {'tree': name, 'files': list(source_files), 'select': select,
+            'entries': n_rows,
+            'columns': [{'name': n, 'expr': e, 'file': f}
+                        for n, e, f in zip(names, exprs, files)]}
+    with open(os.path.join(path, _meta_name), "w") as out_file:
+        json.dump(meta, out_file, indent=1)
+    return Snapshot(path)
+
+class _Column(object):
+    """ stands in for a TBranch in the list of branches of a snapshot """
+
+    def __init__(self, name):
+        self._name = name
+
+    def GetName(self):
+        """ get the name of the column """
+        return self._name
+
+class Snapshot(object):
+    """ memory-mapped columns, usable in place of a tree for drawing """
+
+    def __init__(self, path):
+        """ map the snapshot stored in ''path''
+
+        Parameters
+        ----------
+        path : string
+            directory written by write_snapshot()
+
+        """
+        with open(os.path.join(path, _meta_name)) as in_file:
+            self._meta = json.load(in_file)
+        self._path = path
+        self._names = [c['name'] for c in self._meta['columns']]
+        self._columns = {}
+        for column in self._meta['columns']:
+            self._columns[column['name']] = numpy.load(
+                os.path.join(path, column['file']), mmap_mode="r")
+
+    def __repr__(self):
+        """ get informativ string representation """
+        return "<Snapshot object ("+self._path+", "+str(len(self))+\
+               " entries of "+self._meta['tree']+")>"
+
+    def __len__(self):
+        """ number of stored entries """
+        return self._meta['entries']
+
+    def __getitem__(self, name):
+        """ get the mapped array of column ''name'' """
+        return self._columns[name]
+
+    @property
+    def names(self):
+        """ names of all columns """
+        return list(self._names)
+
+    @property
+    def select(self):
+        """ selection applied when the snapshot was written """
+        return self._meta['select']
+
+    def GetEntries(self):
+        """ number of stored entries (as for a TTree) """
+        return len(self)
+
+    def GetListOfBranches(self):
+        """ get the columns usable in expressions (as for a TTree) """
+        return [_Column(n) for n in self._names if re.match(r"^\w+$", n)]
+
+    def _compile(self, expr):
+        """ get the column name or compiled expression for ''expr'' """
+        if expr in self._columns:
+            return expr
+        return prepare_eval(numpy_formula(expr), self)
+
+    def iter_blocks(self, exprs, select="", block_size=None):
+        """ evaluate expressions for blocks of stored entries
+
+        Same as columnar.iter_blocks() for a tree. Expressions may use any
+        column with a plain identifier as name and the names registered
+        with add_tmath().
+
+        Parameters
+        ----------
+        exprs : list of strings (TFormula)
+            expressions to evaluate, stored columns are used directly
+        select : string
+            selection to appy (default: "")
+        block_size : int
+            number of entries per block (default: default_block_size)
+
+        Yields
+        ------
+        columns : list of numpy arrays
+            one array per expression, entries passing the selection only
+
+        """
+        if block_size == None:
+            block_size = default_block_size
+        compiled = [self._compile(e) for e in exprs]
+        select_expr = None
+        if select != "":
+            select_expr = self._compile(select)
+        namespace = _tmath_namespace()
+        for first in range(0, len(self), block_size):
+            last = min(first+block_size, len(self))
+            evt = Columns((n, c[first:last])
+                          for n, c in self._columns.items())
+            values = [self._evaluate(c, evt, namespace, last-first)
+                      for c in compiled]
+            if select_expr != None:
+                keep = self._evaluate(select_expr, evt, namespace,
+                                      last-first) != 0
+                values = [v[keep] for v in values]
+            yield values
+
+    @staticmethod
+    def _evaluate(compiled, evt, namespace, n_rows):
+        """ get the values of a compiled expression for one block """
+        if isinstance(compiled, str):
+            return numpy.array(evt[compiled], dtype=numpy.float64)
+        values = compiled(evt, namespace)[0]
+        return numpy.asarray(values, dtype=numpy.float64)*numpy.ones(n_rows)
+
+    def range(self, expr):
+        """ get (minimum, maximum) of ''expr'' over all entries """
+        minimum, maximum = None, None
+        for values, in self.iter_blocks([expr]):
+            if len(values) == 0:
+                continue
+            block_min, block_max = values.min(), values.max()
+            if minimum == None or block_min < minimum:
+                minimum = float(block_min)
+            if maximum == None or block_max > maximum:
+                maximum = float(block_max)
+        return (minimum, maximum)
+
+def load_snapshot(path):
+    """ map the snapshot stored in ''path''
+
+    Returns
+    -------
+    snapshot : Snapshot
+        the snapshot, usable as tree in draw(), draw_weighted() and
+        fill_corr_eval()
+
+    """
+    return Snapshot(path)
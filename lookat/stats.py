@@ -0,0 +1,212 @@
+# pylint: disable-msg=E0611, C0103
+""" stats.py - persistent per-branch statistics of trees
+
+This file is part of lookat
+
+Copyright 2013, Nicola Chiapolini, nicola.chiapolini@physik.uzh.ch
+
+License: GNU General Public License version 2,
+         or (at your option) any later version.
+
+Keeps min, max, count and mean of branches (or any expression) for each
+tree, so default binnings can be chosen without extra passes over the data.
+The index is stored as json file and reused in later sessions as long as
+the input files are unchanged. For trees not stored in a file, the
+statistics are only kept in memory, with the tree.
+
+"""
+import os
+import json
+import hashlib
+import numpy
+from lookat.columnar import iter_blocks
+from lookat.cache import tree_identity
+
+default_path = "workspace_stats.json"
+
+class BranchStats(object):
+    """ summary statistics of one branch or expression """
+
+    def __init__(self, count=0, minimum=None, maximum=None, total=0.):
+        """ create statistics, empty by default
+
+        Parameters
+        ----------
+        count : int
+            number of values
+        minimum, maximum : float
+            smallest and largest value
+        total : float
+            sum of all values
+
+        """
+        self.count   = count
+        self.minimum = minimum
+        self.maximum = maximum
+        self.total   = total
+
+    def __repr__(self):
+        """ get informativ string representation """
+        return "<BranchStats object (n={0}, min={1}, max={2}, mean={3})>".format(
+            self.count, self.minimum, self.maximum, self.mean)
+
+    @property
+    def mean(self):
+        """ mean of all values (None if empty) """
+        if self.count == 0:
+            return None
+        return self.total/self.count
+
+    def update(self, values):
+        """ add the values of a block
+
+        Parameters
+        ----------
+        values : numpy array
+            values to add
+
+        """
+        if len(values) == 0:
+            return
+        block_min = float(numpy.min(values))
+        block_max = float(numpy.max(values))
+        if self.count == 0:
+            self.minimum, self.maximum = block_min, block_max
+        else:
+            self.minimum = min(self.minimum, block_min)
+            self.maximum = max(self.maximum, block_max)
+        self.count += len(values)
+        self.total += float(numpy.sum(values))
+
+    def to_dict(self):
+        """ get the statistics as dictionary (for json) """
+        return {'count': self.count, 'minimum': self.minimum,
+                'maximum': self.maximum, 'total': self.total}
+
+class StatsIndex(object):
+    """ statistics of branches for all trees seen, stored on disk """
+
+    def __init__(self, path=None):
+        """ create an index stored in ''path''
+
+        The file is read on first use and written when new statistics are
+        added.
+
+        Parameters
+        ----------
+        path : string
+            json file for the index (default: default_path)
+
+        """
+        if path == None:
+            path = default_path
+        self._path = path
+        self._index = None
+
+    def _load(self):
+        """ get the index, read from disk on first use """
+        if self._index == None:
+            self._index = {}
+            if os.path.exists(self._path):
+                with open(self._path) as in_file:
+                    self._index = json.load(in_file)
+        return self._index
+
+    def _save(self):
+        """ write the index to disk """
+        with open(self._path, "w") as out_file:
+            json.dump(self._index, out_file, indent=1, sort_keys=True)
+
+    @staticmethod
+    def _tree_key(tree):
+        """ get the key identifying ''tree'' and its files, None if the tree
+        is not stored in a file """
+        identity = tree_identity(tree)
+        if identity == None:
+            return None
+        return hashlib.sha1(identity.encode("utf-8")).hexdigest()
+
+    def _tree_stats(self, tree):
+        """ get the dictionary with the statistics of ''tree'' by variable """
+        key = self._tree_key(tree)
+        if key == None:
+            try:
+                return tree.lookat_stats
+            except AttributeError:
+                tree.lookat_stats = {}
+                return tree.lookat_stats
+        return self._load().setdefault(key, {})
+
+    def lookup(self, tree, var):
+        """ get the stored statistics of ''var'' without reading the tree
+
+        Returns
+        -------
+        stats : BranchStats or None
+            stored statistics, None if var is not in the index
+
+        """
+        try:
+            return BranchStats(**self._tree_stats(tree)[var])
+        except KeyError:
+            return None
+
+    def store(self, tree, var, stats):
+        """ add statistics of ''var'' obtained from a full pass over ''tree''
+
+        Parameters
+        ----------
+        tree : TTree
+            tree the statistics belong to
+        var : string
+            branch name or expression
+        stats : BranchStats
+            statistics over all entries of tree
+
+        """
+        self._tree_stats(tree)[var] = stats.to_dict()
+        if self._tree_key(tree) != None:
+            self._save()
+
+    def build(self, tree, var_list):
+        """ fill the statistics of all variables in ''var_list'' in one pass
+
+        Parameters
+        ----------
+        tree : TTree
+            tree to read
+        var_list : list of strings
+            branch names or expressions
+
+        """
+        all_stats = [BranchStats() for _ in var_list]
+        for columns in iter_blocks(tree, var_list):
+            for stats, values in zip(all_stats, columns):
+                stats.update(values)
+        for var, stats in zip(var_list, all_stats):
+            self.store(tree, var, stats)
+
+    def get(self, tree, var):
+        """ get statistics of ''var'', reading the tree only the first time
+
+        Returns
+        -------
+        stats : BranchStats
+            statistics over all entries of tree
+
+        """
+        stats = self.lookup(tree, var)
+        if stats == None:
+            self.build(tree, [var])
+            stats = self.lookup(tree, var)
+        return stats
+
+    def range(self, tree, var):
+        """ get (minimum, maximum) of ''var'' in ''tree''
+
+        Replaces tree.GetMinimum(var) and tree.GetMaximum(var), which need a
+        pass over the tree each. Both are None if the tree has no entries.
+
+        """
+        stats = self.get(tree, var)
+        return (stats.minimum, stats.maximum)
@@ -0,0 +1,102 @@
+# pylint: disable-msg=E0611, C0103
+""" treecache.py - read cache and decompression settings for trees
+
+This file is part of lookat
+
+Copyright 2013, Nicola Chiapolini, nicola.chiapolini@physik.uzh.ch
+
+License: GNU General Public License version 2,
+         or (at your option) any later version.
+
+The TTreeCache collects the baskets of all used branches and reads them in
+a few large requests. Either it learns the used branches during the first
+entries, or the branches are given explicitly. With implicit multithreading
+enabled, ROOT decompresses the baskets of different branches in parallel.
+
+"""
+from lookat.lazyroot import ROOT
+
+default_cache_size = 32*1024*1024
+
+def enable_implicit_mt(n_threads=0):
+    """ let ROOT decompress baskets in parallel (if supported)
+
+    Do not combine with worker processes (n_workers), forking a process
+    with running threads is not safe.
+
+    Parameters
+    ----------
+    n_threads : int
+        number of threads to use (default: 0, let ROOT decide)
+
+    Returns
+    -------
+    enabled : Boolean
+        False if this version of ROOT has no implicit multithreading
+
+    """
+    try:
+        ROOT.ROOT.EnableImplicitMT(n_threads)
+    except AttributeError:
+        return False
+    return True
+
+def configure_cache(tree, size=None, branches=None, learn_entries=None):
+    """ set up the read cache of ''tree''
+
+    Parameters
+    ----------
+    tree : TTree or TChain
+        tree to configure
+    size : int
+        cache size in bytes, 0 disables the cache
+        (default: default_cache_size)
+    branches : list of strings
+        branches to cache, ends the learning phase right away
+        (default: None, learn the branches used)
+    learn_entries : int
+        number of entries used to learn the branches
+        (default: None, keep ROOT's default)
+
+    """
+    if size == None:
+        size = default_cache_size
+    tree.SetCacheSize(size)
+    if size == 0:
+        return
+    if branches != None:
+        for name in branches:
+            tree.AddBranchToCache(name, True)
+        tree.StopCacheLearningPhase()
+    elif learn_entries != None:
+        tree.SetCacheLearnEntries(learn_entries)
+
+def cache_stats(tree):
+    """ get read statistics of ''tree''
+
+    For chains, the numbers refer to the file currently read.
+
+    Parameters
+    ----------
+    tree : TTree or TChain
+        tree to get statistics for
+
+    Returns
+    -------
+    stats : dictionary
+        cache_size, n_read_ok and n_read_miss (reads served from the cache
+        or not), bytes_read and read_calls (of the file)
+
+    """
+    stats = {'cache_size': int(tree.GetCacheSize()), 'n_read_ok': 0,
+             'n_read_miss': 0, 'bytes_read': 0, 'read_calls': 0}
+    the_file = tree.GetCurrentFile()
+    if not the_file:
+        return stats
+    stats['bytes_read'] = int(the_file.GetBytesRead())
+    stats['read_calls'] = int(the_file.GetReadCalls())
+    cache = the_file.GetCacheRead(tree.GetTree())
+    if cache and cache.InheritsFrom("TTreeCache"):
+        stats['n_read_ok'] = int(cache.GetNReadOk())
+        stats['n_read_miss'] = int(cache.GetNReadMiss())
+    return stats
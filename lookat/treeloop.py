@@ -0,0 +1,197 @@
+# pylint: disable-msg=E0611, C0103
+""" treeloop.py - helper functions to loop over selected tree entries
+
+This file is part of lookat
+
+Copyright 2013, Nicola Chiapolini, nicola.chiapolini@physik.uzh.ch
+
+License: GNU General Public License version 2,
+         or (at your option) any later version.
+
+"""
+from contextlib import contextmanager
+from lookat.lazyroot import ROOT
+
+try:
+    _range = xrange
+except NameError:
+    _range = range
+
+def selected_entries(tree, select):
+    """ evaluate ''select'' into an entry list
+
+    The list is detached from gDirectory, so nothing gets written into the
+    workspace.
+
+    Parameters
+    ----------
+    tree : TTree
+        tree to evaluate the selection for
+    select : string
+        selection to appy
+
+    Returns
+    -------
+    elist : TEntryList
+        list of all entries passing the selection
+
+    Raises
+    ------
+    ValueError
+        if the selection can not be evaluated
+
+    """
+    name = "lookat_elist_"+str(id(tree))
+    tree.Draw(">>"+name, select, "entrylist")
+    elist = ROOT.gDirectory.Get(name)
+    if not elist:
+        raise ValueError("can not evaluate selection '"+select+"'")
+    elist.SetDirectory(0)
+    return elist
+
+def _all_branches(branches):
+    """ get all branches in ''branches'' including their sub-branches """
+    for branch in branches:
+        yield branch
+        for sub_branch in _all_branches(branch.GetListOfBranches()):
+            yield sub_branch
+
+@contextmanager
+def branch_status(tree, branches):
+    """ read only ''branches'' of ''tree'' within a with-statement
+
+    All other branches are disabled, afterwards the previous status of all
+    branches is restored.
+
+    Parameters
+    ----------
+    tree : TTree
+        tree to prune
+    branches : list of strings
+        names of the branches to read
+
+    """
+    old_status = [(b.GetName(), tree.GetBranchStatus(b.GetName()))
+                  for b in _all_branches(tree.GetListOfBranches())]
+    tree.SetBranchStatus("*", 0)
+    for name in branches:
+        tree.SetBranchStatus(name, 1)
+    try:
+        yield tree
+    finally:
+        for name, status in old_status:
+            tree.SetBranchStatus(name, status)
+
+def iter_entries(tree, select="", branches=None, elist=None):
+    """ loop over all entries of ''tree'' passing ''select''
+
+    Unlike looping over tree.CopyTree(select), no intermediate tree is
+    created. The selected entries are read one by one from the original
+    tree.
+
+    Parameters
+    ----------
+    tree : TTree
+        tree to take events from
+    select : string
+        selection to appy (default: "")
+    branches : list of strings
+        branches needed in the loop, all others are not read
+        (default: None, read all branches)
+    elist : TEntryList
+        entries passing select, if already known (default: None)
+
+    Yields
+    ------
+    evt : TTree
+        the tree with the next selected entry loaded
+
+    """
+    if elist == None and select != "":
+        elist = selected_entries(tree, select)
+    if branches == None:
+        return _iter_entries(tree, elist)
+    return _iter_pruned(tree, elist, branches)
+
+def _iter_pruned(tree, elist, branches):
+    """ loop over the entries with only ''branches'' enabled """
+    with branch_status(tree, branches):
+        for evt in _iter_entries(tree, elist):
+            yield evt
+
+def _iter_entries(tree, elist):
+    """ loop over all entries in ''elist'' (all entries if None) """
+    if elist == None:
+        for entry in _range(int(tree.GetEntries())):
+            tree.GetEntry(entry)
+            yield tree
+        return
+    old_list = tree.GetEntryList()
+    tree.SetEntryList(elist)
+    try:
+        for i in _range(int(elist.GetN())):
+            tree.GetEntry(tree.GetEntryNumber(i))
+            yield tree
+    finally:
+        tree.SetEntryList(old_list)
+
+def tree_source(tree):
+    """ get a picklable description of where ''tree'' is read from
+
+    Used to re-open the same data in another process.
+
+    Parameters
+    ----------
+    tree : TTree or TChain
+        tree to describe
+
+    Returns
+    -------
+    source : tuple or None
+        (tree name including directory path, tuple of file names), None for
+        trees not stored in a file
+
+    """
+    if tree.InheritsFrom("TChain"):
+        files = tuple(el.GetTitle() for el in tree.GetListOfFiles())
+        return (tree.GetName(), files)
+    directory = tree.GetDirectory()
+    if not directory or not directory.GetFile():
+        return None
+    path = directory.GetPath().split(':', 1)[-1].strip('/')
+    name = tree.GetName()
+    if path != "":
+        name = path+"/"+name
+    return (name, (directory.GetFile().GetName(),))
+
+_open_trees = {}
+
+def open_tree(source, reuse=True):
+    """ open the tree described by ''source''
+
+    By default, the chain is created only once per process and reused
+    afterwards.
+
+    Parameters
+    ----------
+    source : tuple
+        description as returned by tree_source()
+    reuse : Boolean
+        if False, always create a new chain, e.g. for use in a separate
+        thread (default: True)
+
+    Returns
+    -------
+    the_tree : TChain
+        chain containing all files from source
+
+    """
+    if reuse and source in _open_trees:
+        return _open_trees[source]
+    name, files = source
+    chain = ROOT.TChain(name, "")
+    for f in files:
+        chain.Add(f)
+    if reuse:
+        _open_trees[source] = chain
+    return chain
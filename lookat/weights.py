@@ -0,0 +1,113 @@
+# pylint: disable-msg=E0611, C0103
+""" weights.py - histogram lookup tables for use in TTree.Draw()
+
+This file is part of lookat
+
+Copyright 2013, Nicola Chiapolini, nicola.chiapolini@physik.uzh.ch
+
+License: GNU General Public License version 2,
+         or (at your option) any later version.
+
+Declares small compiled helper functions that look up the content of a
+registered histogram. They can be called from any TTree.Draw() expression,
+so weighting an event costs one FindFixBin() instead of one comparison per
+bin as with create_weight_string().
+
+"""
+from lookat.lazyroot import ROOT
+from lookat.columnar import get_lookup
+
+_cpp_code = """
+#include "TH1.h"
+#include <vector>
+
+std::vector<TH1*> lookat_weight_histos;
+
+int lookat_register_weight(TH1* histo)
+{
+    lookat_weight_histos.push_back(histo);
+    return lookat_weight_histos.size()-1;
+}
+
+double lookat_weight1(int id, double x)
+{
+    TH1* histo = lookat_weight_histos[id];
+    return histo->GetBinContent(histo->FindFixBin(x));
+}
+
+double lookat_weight2(int id, double x, double y)
+{
+    TH1* histo = lookat_weight_histos[id];
+    return histo->GetBinContent(histo->FindFixBin(x, y));
+}
+"""
+_declared = False
+_registered = {}
+
+def _declare():
+    """ make the helper functions known to the interpreter (once) """
+    global _declared
+    if _declared:
+        return
+    try:
+        ROOT.gInterpreter.Declare(_cpp_code)
+    except AttributeError:
+        ROOT.gROOT.ProcessLine(_cpp_code)
+    _declared = True
+
+def register_weight(histo):
+    """ register a copy of ''histo'' as lookup table
+
+    Histograms with the same binning and content share one table, so
+    drawing repeatedly with the same weight registers it only once.
+
+    Parameters
+    ----------
+    histo : TH1F, TH2F or RatioTHnF
+        histogram to take the weights from
+
+    Returns
+    -------
+    w_id : int
+        id of the lookup table, used as first argument of the helpers
+
+    """
+    _declare()
+    try:
+        histo = histo.thnf
+    except AttributeError:
+        pass
+    digest = get_lookup(histo).digest()
+    if digest not in _registered:
+        table = histo.Clone(histo.GetName()+"_weights")
+        table.SetDirectory(0)
+        _registered[digest] = (table, ROOT.lookat_register_weight(table))
+    return _registered[digest][1]
+
+def weight_formula(histo):
+    """ create a weight expression based on passed histogram
+
+    creates a string that can be used in TTree.Draw() to weight the events
+    according to the content of the passed histogram. Unlike the string from
+    create_weight_string(), the expression calls a compiled lookup and
+    therefore only works within this session.
+
+    Parameters
+    ----------
+    histo : TH1F, TH2F or RatioTHnF
+        histogram to take weights from, var_info must be set
+
+    Returns
+    -------
+    output : string
+        string for use as weight in TTree.Draw()
+
+    """
+    var_parts = histo.var_info.split(':')
+    w_id = register_weight(histo)
+    if len(var_parts) == 1:
+        return "lookat_weight1({0}, {1})".format(w_id, var_parts[0])
+    elif len(var_parts) == 2:
+        return "lookat_weight2({0}, {1}, {2})".format(w_id, var_parts[1],
+                                                      var_parts[0])
+    raise NotImplementedError("weights supported for 1- and 2-D histograms only")
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark for the startup time of lookat without the interactive session
+This test must be run independently:
+  nosetests check_startup.py
+
+"""
+import sys
+import subprocess
+from nose.tools import assert_less, assert_equal
+
+max_seconds = 0.2
+core_modules = ["lookat", "lookat.columnar", "lookat.evallib", "lookat.cache",
+                "lookat.stats", "lookat.background", "lookat.fileio",
+                "lookat.treecache", "lookat.catalog", "lookat.snapshot",
+                "lookat.friends", "lookat.selections", "lookat.weights",
+                "lookat.canvashandler"]
+
+_timing_code = """
+import sys, time
+start = time.time()
+for name in sys.argv[1:]:
+    __import__(name)
+print(time.time()-start)
+print('ROOT' in sys.modules)
+print('lookat.session' in sys.modules)
+"""
+
+def _import_time():
+    """ import the core modules in a fresh interpreter, get the time taken """
+    output = subprocess.check_output([sys.executable, "-c", _timing_code] +
+                                     core_modules)
+    seconds, root_loaded, session_loaded = output.decode().split()
+    return float(seconds), root_loaded, session_loaded
+
+def test_startup_time():
+    # best of three, to be robust against a cold file system cache
+    results = [_import_time() for _ in range(3)]
+    seconds = min(r[0] for r in results)
+    print("core import: {0:.3f} s".format(seconds))
+    assert_equal(results[0][1], "False")
+    assert_equal(results[0][2], "False")
+    assert_less(seconds, max_seconds)
@@ -8,7 +8,16 @@ to run:
   3) run ''nosetests''
 
 """
+import os
+import tempfile
 from nose.tools import assert_equal, assert_less, assert_raises, assert_is_instance
+
+# keep cached histograms, entry counts and statistics out of the user's
+# cache and the test directory
+test_cache = tempfile.mkdtemp(prefix="lookat_test_")
+os.environ["LOOKAT_CACHE"] = test_cache
+import lookat.stats
+lookat.stats.default_path = os.path.join(test_cache, "workspace_stats.json")
 from lookat import *
 
 def test_globallists():
@@ -42,10 +51,50 @@ def test_createchain():
     assert_is_instance(gTrees[-1], TChain)
     assert_equal(gTrees[-1].GetName(), "simple_tree")
 
+def test_addfile_reuse():
+    """ files already open are not opened again, broken files are reported """
+    the_file = add_file('./test_input.root')
+    assert_equal(len(gFiles), 1)
+    assert_equal(the_file, gFiles[-1])
+    assert_equal(add_file('test_*.root'), [gFiles[-1]])
+    assert_equal(add_file(u'test_input.root'), the_file)
+    assert_raises(RuntimeError, add_file, ['test_input.root', 'missing.root'])
+    assert_equal(len(gFiles), 1)
+    assert_raises(RuntimeError, create_chain, 'no_tree', 'test_input.root')
+    assert_equal(len(gTrees), 2)
+    assert_raises(RuntimeError, create_chain, 'simple_tree',
+                  ['test_input.root', 'missing.root'])
+    assert_equal(len(gTrees), 2)
+
+def test_entry_index():
+    """ entry counts of chained files are stored in gEntries """
+    assert_equal(gEntries.lookup(['test_input.root'], 'simple_tree'), [200])
+    assert_equal(gEntries.lookup(['missing.root'], 'simple_tree'), [None])
+    assert_equal(gTrees[1].GetEntries(), 200)
+
 def test_getbranchlist():
     """ check the content of the last tree """
     assert_equal( ['int_leaf', 'double_leaf'], get_branch_list() )
 
+def test_branch_catalog():
+    """ search the branches of a tree """
+    catalog = get_catalog(gTrees[-1])
+    assert_equal(catalog, get_catalog(gTrees[-1]))
+    assert_equal(len(catalog), 2)
+    assert_equal(catalog['int_leaf'].entries, 200)
+    assert_equal(catalog.prefix('int'), ['int_leaf'])
+    assert_equal(get_branch_list(pattern='*_leaf'), ['double_leaf', 'int_leaf'])
+    assert_equal(find_branch('dubble_leaf'), ['double_leaf'])
+    assert_equal(len(heaviest_branches(1)), 1)
+    ### chains: entries and sizes of all files
+    from ROOT import TChain
+    chain = TChain('simple_tree')
+    chain.Add('test_input.root')
+    chain.Add('test_input.root')
+    chain_catalog = get_catalog(chain)
+    assert_equal(chain_catalog['int_leaf'].entries, 400)
+    assert_equal(chain_catalog['int_leaf'].zip_bytes, 2*catalog['int_leaf'].zip_bytes)
+
 def test_draw():
     """ create a simple plot
 
@@ -72,6 +121,20 @@ def test_drawratio():
     assert_equal(gHistos[-1]._ratio.GetBinContent(5), 2.0)
     assert_equal(gHistos[-1]._ratio.GetBinContent(6), 0.0)
 
+def test_ratio_batch():
+    """ bin edges and contents of a ratio are looked up with numpy """
+    import numpy
+    ratio = gHistos[-1]
+    edges = ratio.bin_edges_x
+    assert_equal(len(edges), ratio.thnf.GetNbinsX()+1)
+    assert_equal(edges[-1], ratio.thnf.GetXaxis().GetXmax())
+    contents = ratio.get_content_batch(numpy.array([0.5, 4.5, 5.5, -1.0]))
+    assert_equal(contents.tolist(), [2.0, 2.0, 0.0, 0.0])
+    ratio.thnf.SetBinContent(1, 3.0)
+    assert_equal(ratio.get_content_batch(numpy.array([0.5]))[0], 3.0)
+    ratio.thnf.SetBinContent(1, 2.0)
+    ratio.invalidate()
+
 def test_createweightstring():
     w_str = create_weight_string(gHistos[-1].thnf)
     assert_equal(w_str, "(2.000*(0.00 <= double_leaf*5 && double_leaf*5 < 1.00)+2.000*(1.00 <= double_leaf*5 && double_leaf*5 < 2.00)+2.000*(2.00 <= double_leaf*5 && double_leaf*5 < 3.00)+2.000*(3.00 <= double_leaf*5 && double_leaf*5 < 4.00)+2.000*(4.00 <= double_leaf*5 && double_leaf*5 < 5.00)+0.000*(5.00 <= double_leaf*5 && double_leaf*5 < 6.00)+0.000*(6.00 <= double_leaf*5 && double_leaf*5 < 7.00)+0.000*(7.00 <= double_leaf*5 && double_leaf*5 < 8.00)+0.000*(8.00 <= double_leaf*5 && double_leaf*5 < 9.00)+0.000*(9.00 <= double_leaf*5 && double_leaf*5 < 10.00)+0.000*(10.00 <= double_leaf*5 && double_leaf*5 < 11.00))")
@@ -183,3 +246,423 @@ def test_puttexts():
     assert_equal(gHistos[-1].GetXaxis().GetTitle(), "x-axis")
     assert_equal(gHistos[-1].GetYaxis().GetTitle(), "y-axis")
 
+
+def test_draw_weighted_columnar():
+    """ columnar filling gives the same histogram as the event loop """
+    canvas()
+    h_all = draw('int_leaf', h_cfg="(10,0,10)", tree=gTrees[1])
+    h_sel = draw('int_leaf', 'double_leaf < 0.45', h_cfg="(10,0,10)", tree=gTrees[1])
+    ratio = draw_ratio(h_sel, h_all, normalised=False)
+    h_loop = draw_corrected('int_leaf', ratio, 'double_leaf < 0.75', tree=gTrees[1])
+    h_col  = draw_corrected('int_leaf', ratio, 'double_leaf < 0.75', tree=gTrees[1],
+                            columnar=True)
+    assert_equal(h_loop.GetNbinsX(), h_col.GetNbinsX())
+    for i in range(h_loop.GetNbinsX()+2):
+        assert_equal(h_loop.GetBinContent(i), h_col.GetBinContent(i))
+        assert_equal(h_loop.GetBinError(i), h_col.GetBinError(i))
+    assert_equal(h_loop.GetEntries(), h_col.GetEntries())
+
+def test_draw_weighted_workers():
+    """ filling in worker processes gives the same histogram """
+    ratio = gHistos[-3]
+    h_col = gHistos[-1]
+    h_par = draw_corrected('int_leaf', ratio, 'double_leaf < 0.75', tree=gTrees[1],
+                           n_workers=2)
+    for i in range(h_col.GetNbinsX()+2):
+        assert_equal(h_col.GetBinContent(i), h_par.GetBinContent(i))
+        assert_equal(h_col.GetBinError(i), h_par.GetBinError(i))
+    ### several partial histograms, added in the order of the entries
+    from lookat.columnar import fill_weighted, get_lookup
+    h_parts = TH1F("h_parts", "", 10, 0, 10)
+    n_skipped = fill_weighted(h_parts, 'int_leaf', get_lookup(ratio.thnf),
+                              ['int_leaf'], gTrees[1], 'double_leaf < 0.75',
+                              inverse_weight=True, block_size=30, n_workers=2)
+    assert_equal(n_skipped, 0)
+    assert_equal(h_parts.GetEntries(), h_col.GetEntries())
+    for i in range(h_col.GetNbinsX()+2):
+        assert_equal(round(h_col.GetBinContent(i), 4), round(h_parts.GetBinContent(i), 4))
+        assert_equal(round(h_col.GetBinError(i), 4), round(h_parts.GetBinError(i), 4))
+
+def test_draw_weight_histogram():
+    """ weighting with a lookup table equals the weight string """
+    ratio = gHistos[-4]
+    h_str = draw('int_leaf', create_weight_string(ratio.thnf), h_cfg="(10,0,10)",
+                 tree=gTrees[1])
+    h_lut = draw('int_leaf', weight=ratio, h_cfg="(10,0,10)", tree=gTrees[1])
+    for i in range(h_str.GetNbinsX()+2):
+        assert_equal(h_str.GetBinContent(i), h_lut.GetBinContent(i))
+    ### the lookup table is registered once
+    from lookat.weights import register_weight, _registered
+    n_tables = len(_registered)
+    w_id = register_weight(ratio)
+    draw('int_leaf', weight=ratio, h_cfg="(10,0,10)", tree=gTrees[1])
+    assert_equal(register_weight(ratio), w_id)
+    assert_equal(len(_registered), n_tables)
+
+def test_draw_many():
+    """ fill several histograms in one pass """
+    n_canvs = len(gCanvs)
+    h_int, h_dbl = draw_many(['int_leaf', 'double_leaf*5'], 'double_leaf < 0.75',
+                             h_cfg="(10,0,10)", tree=gTrees[1])
+    assert_equal(len(gCanvs), n_canvs+1)
+    assert_equal(sorted(gCanvs[-1].pads.keys()), ['main', 'pad_1'])
+    assert_equal(gHistos[-1], h_dbl)
+    assert_equal(h_int.var_info, 'int_leaf')
+    h_ref = draw('int_leaf', 'double_leaf < 0.75', h_cfg="(10,0,10)", tree=gTrees[1])
+    for i in range(h_ref.GetNbinsX()+2):
+        assert_equal(h_ref.GetBinContent(i), h_int.GetBinContent(i))
+    assert_equal(h_dbl.GetEntries(), 160)
+    assert_raises(ValueError, draw_many, ['int_leaf', 'double_leaf'], h_name="fixed",
+                  tree=gTrees[1])
+
+def test_draw_cache():
+    """ filled histograms are stored in the cache and can be bypassed """
+    h_first = draw('int_leaf', 'double_leaf > 0.25', h_cfg="(10,0,10)", tree=gTrees[1],
+                   cache=True)
+    key = gCache.key(gTrees[1], 'int_leaf', 'double_leaf > 0.25', "(10,0,10)")
+    h_cached = gCache.get(key, "cache_test")
+    assert_equal(h_cached.GetEntries(), h_first.GetEntries())
+    h_second = draw('int_leaf', 'double_leaf > 0.25', h_cfg="(10,0,10)", tree=gTrees[1])
+    for i in range(h_first.GetNbinsX()+2):
+        assert_equal(h_first.GetBinContent(i), h_cached.GetBinContent(i))
+        assert_equal(h_first.GetBinContent(i), h_second.GetBinContent(i))
+    ### nothing is stored without cache=True
+    key = gCache.key(gTrees[1], 'int_leaf', 'double_leaf > 0.35', "(10,0,10)")
+    draw('int_leaf', 'double_leaf > 0.35', h_cfg="(10,0,10)", tree=gTrees[1])
+    assert_equal(gCache.get(key, "cache_test"), None)
+    ### aliases change the key, entry lists bypass the cache
+    gTrees[1].SetAlias('cut_value', 'double_leaf*10')
+    assert_equal(gCache.key(gTrees[1], 'int_leaf', 'double_leaf > 0.35', "(10,0,10)") == key,
+                 False)
+    gTrees[1].GetListOfAliases().Clear()
+    assert_equal(gCache.key(gTrees[1], 'int_leaf', 'double_leaf > 0.35', "(10,0,10)"), key)
+    elist = gSelections.get(gTrees[1], 'int_leaf > 2', force=True)
+    gTrees[1].SetEntryList(elist)
+    assert_equal(gCache.key(gTrees[1], 'int_leaf', '', "(10,0,10)"), None)
+    gTrees[1].SetEntryList(0)
+
+def _memory_tree(name, n_entries):
+    """ create a tree with branch x = 0, 1, ... that is not stored in a file """
+    import numpy
+    from ROOT import gROOT
+    dir_path = gDirectory.GetPath()
+    gROOT.cd()
+    x = numpy.zeros(1, dtype=numpy.float64)
+    tree = TTree(name, "in memory")
+    tree.Branch('x', x, 'x/D')
+    for i in range(n_entries):
+        x[0] = i
+        tree.Fill()
+    gROOT.cd(dir_path)
+    return tree
+
+def test_draw_memory_tree():
+    """ trees not stored in a file are drawn without the cache """
+    tree = _memory_tree("memory_tree", 100)
+    assert_equal(gCache.key(tree, 'x', '', "(10,0,100)"), None)
+    h = draw('x', 'x < 50', h_cfg="(10,0,100)", tree=tree, cache=True)
+    assert_equal(h.GetEntries(), 50)
+
+def test_branch_stats():
+    """ statistics are computed once and stored in gStats """
+    stats = branch_stats('int_leaf', gTrees[1])
+    assert_equal(stats.count, 200)
+    assert_equal(stats.minimum, 0)
+    assert_equal(stats.maximum, 9)
+    assert_equal(stats.mean, 4.5)
+    assert_equal(gStats.lookup(gTrees[1], 'int_leaf').maximum, 9)
+
+def test_branch_stats_memory_tree():
+    """ statistics of trees not stored in a file are kept in memory """
+    tree = _memory_tree("stats_tree", 20)
+    empty = _memory_tree("empty_tree", 0)
+    assert_equal(gStats.range(tree, 'x'), (0, 19))
+    assert_equal(gStats.range(empty, 'x'), (None, None))
+    h_x = draw('x', h_cfg="(4,0,20)", tree=tree, cache=False)
+    ratio = draw_ratio(h_x, h_x, normalised=False)
+    h = draw_weighted('2*x', ratio, tree=tree)
+    assert_equal(h.GetEntries(), 20)
+    assert_equal(h.GetXaxis().GetXmax(), 38)
+    assert_equal(draw_weighted('2*x', ratio, tree=empty).GetEntries(), 0)
+
+def test_draw_async():
+    """ fill a histogram in the background and wait for it """
+    job = draw_async('gauss_leaf', 'nr_leaf % 2 == 0', h_cfg="(20,-4,4)", tree=gTrees[0])
+    assert_equal(gJobs[-1], job)
+    assert_equal(gHistos[-1], job.histogram)
+    assert_equal(job.wait(60), True)
+    assert_equal(job.error, None)
+    assert_equal(job.progress, 1.)
+    assert_equal(job.histogram.GetEntries(), 50000)
+
+def test_draw_async_main_thread():
+    """ the thread only reads, the histogram is filled when polled """
+    from lookat.background import poll_jobs
+    job = draw_async('gauss_leaf', 'nr_leaf % 2 == 0', h_cfg="(20,-4,4)", tree=gTrees[0])
+    job._stopped.wait(60)
+    assert_equal(job.histogram.GetEntries(), 0)
+    assert_equal(job.done, False)
+    poll_jobs()
+    assert_equal(job.done, True)
+    assert_equal(job.histogram.GetEntries(), 50000)
+
+def test_fill_job_read_ahead():
+    """ the thread stops reading while too many blocks are waiting """
+    from lookat.background import FillJob
+    h = TH1F("h_read_ahead", "", 20, -4, 4)
+    job = FillJob(h, gTrees[0], ['gauss_leaf'], block_size=1000, max_blocks=2)
+    job.start()
+    assert_equal(job._stopped.wait(2), False)
+    assert_equal(job._results.qsize() <= 2, True)
+    assert_equal(job.wait(60), True)
+    assert_equal(h.GetEntries(), 100000)
+
+def test_sample_entries():
+    """ random samples of huge trees do not permute all entries """
+    import numpy
+    from lookat.columnar import sample_entries
+    entries = sample_entries(10**12, 1000, "random")
+    assert_equal(len(numpy.unique(entries)), 1000)
+    assert_equal(entries.tolist(), sorted(entries.tolist()))
+    assert_less(entries[-1], 10**12)
+    assert_equal(sample_entries(10, 20, "random").tolist(), list(range(10)))
+
+def test_draw_preview():
+    """ a preview is refined in the background to the full histogram """
+    h_ref = draw('gauss_leaf', 'nr_leaf % 2 == 0', h_cfg="(20,-4,4)", tree=gTrees[0],
+                 cache=False)
+    h_prev = draw('gauss_leaf', 'nr_leaf % 2 == 0', h_cfg="(20,-4,4)", tree=gTrees[0],
+                  preview=("stride", 1000))
+    assert_equal(gJobs[-1].histogram, h_prev)
+    assert_equal(gJobs[-1].wait(60), True)
+    assert_equal(gJobs[-1].error, None)
+    for i in range(h_ref.GetNbinsX()+2):
+        assert_equal(h_ref.GetBinContent(i), h_prev.GetBinContent(i))
+
+def test_draw_preview_auto_range():
+    """ with automatic binning, the range is chosen after the full pass """
+    h_ref = draw('gauss_leaf', 'nr_leaf % 2 == 0', tree=gTrees[0], cache=False)
+    h_prev = draw('gauss_leaf', 'nr_leaf % 2 == 0', tree=gTrees[0],
+                  preview=("stride", 1000))
+    assert_equal(gJobs[-1].wait(60), True)
+    assert_equal(h_prev.GetNbinsX(), h_ref.GetNbinsX())
+    assert_equal(h_prev.GetXaxis().GetXmin(), h_ref.GetXaxis().GetXmin())
+    assert_equal(h_prev.GetXaxis().GetXmax(), h_ref.GetXaxis().GetXmax())
+    for i in range(h_ref.GetNbinsX()+2):
+        assert_equal(h_ref.GetBinContent(i), h_prev.GetBinContent(i))
+
+def test_branch_status():
+    """ only referenced branches are read, the status is restored afterwards """
+    from lookat.treeloop import branch_status
+    branches = referenced_branches(gTrees[0], ['gauss_leaf*5', 'gauss_leaf>0'])
+    assert_equal(branches, ['gauss_leaf'])
+    with branch_status(gTrees[0], branches):
+        assert_equal(gTrees[0].GetBranchStatus('gauss_leaf'), 1)
+        assert_equal(gTrees[0].GetBranchStatus('nr_leaf'), 0)
+    assert_equal(gTrees[0].GetBranchStatus('nr_leaf'), 1)
+
+def test_cache_stats():
+    """ trees get a read cache, its statistics are available """
+    draw('gauss_leaf', h_cfg="(20,-4,4)", tree=gTrees[0], cache=False)
+    stats = cache_stats(gTrees[0])
+    assert_equal(stats['cache_size'], 32*1024*1024)
+    assert_less(0, stats['bytes_read'])
+    assert_less(0, stats['read_calls'])
+
+def test_walk_keys():
+    """ list the content of a file from the key headers """
+    keys = list(walk_keys(gFiles[0], class_name='TTree'))
+    assert_equal(sorted(set(k.name for k in keys)), ['advanced_tree', 'simple_tree'])
+    assert_equal(list(walk_keys(gFiles[0], name='simple_*'))[0].class_name, 'TTree')
+
+def test_snapshot():
+    """ write selected columns and draw from the mapped files """
+    import tempfile
+    path = tempfile.mkdtemp()
+    snap = snapshot(['gauss_leaf', 'nr_leaf'], 'nr_leaf % 2 == 0', path, gTrees[0],
+                    names=['gauss', 'nr'])
+    assert_equal(len(load_snapshot(path)), 50000)
+    h_snap = draw('gauss', 'nr < 1000 && gauss > 0', h_cfg="(20,-4,4)", tree=snap)
+    h_ref = draw('gauss_leaf', 'nr_leaf % 2 == 0 && nr_leaf < 1000 && gauss_leaf > 0',
+                 h_cfg="(20,-4,4)", tree=gTrees[0], cache=False)
+    for i in range(h_ref.GetNbinsX()+2):
+        assert_equal(h_ref.GetBinContent(i), h_snap.GetBinContent(i))
+    ### selection times weight
+    h_snap = draw('gauss', '(nr < 1000 && gauss > 0)*(nr+1)', h_cfg="(20,-4,4)",
+                  tree=snap)
+    h_ref = draw('gauss_leaf', '(nr_leaf % 2 == 0 && nr_leaf < 1000 && gauss_leaf > 0)*(nr_leaf+1)',
+                 h_cfg="(20,-4,4)", tree=gTrees[0], cache=False)
+    for i in range(h_ref.GetNbinsX()+2):
+        assert_equal(round(h_ref.GetBinContent(i), 3), round(h_snap.GetBinContent(i), 3))
+    ### logical operators on float columns
+    h_snap = draw('gauss', '!nr', h_cfg="(20,-4,4)", tree=snap)
+    assert_equal(h_snap.GetEntries(), 1)
+    h_snap = draw('gauss', 'nr && gauss', h_cfg="(20,-4,4)", tree=snap)
+    h_ref = draw('gauss_leaf', 'nr_leaf % 2 == 0 && nr_leaf && gauss_leaf',
+                 h_cfg="(20,-4,4)", tree=gTrees[0], cache=False)
+    assert_equal(h_snap.GetEntries(), h_ref.GetEntries())
+    for i in range(h_ref.GetNbinsX()+2):
+        assert_equal(h_ref.GetBinContent(i), h_snap.GetBinContent(i))
+
+def test_join():
+    """ match entries of a friend tree in different order """
+    import numpy
+    nr = numpy.zeros(1, dtype=numpy.int32)
+    val = numpy.zeros(1, dtype=numpy.float64)
+    truth = TTree("truth", "friend in reversed order")
+    truth.Branch('nr_leaf', nr, 'nr_leaf/I')
+    truth.Branch('val', val, 'val/D')
+    for i in reversed(range(1000)):
+        nr[0] = i
+        val[0] = 2*i
+        truth.Fill()
+    join(gTrees[0], truth, ['nr_leaf'])
+    h = draw('truth.val-2*nr_leaf', 'nr_leaf < 1000', h_cfg="(3,-1.5,1.5)", tree=gTrees[0])
+    assert_equal(h.GetBinContent(2), 1000)
+    gTrees[0].RemoveFriend(truth)
+
+def test_selection_cache():
+    """ selections are evaluated when reused, combined ones by intersection """
+    select = 'nr_leaf % 2 == 0 && gauss_leaf > 0'
+    h = draw('gauss_leaf', select, h_cfg="(20,-4,4)", tree=gTrees[0], cache=False)
+    n_selected = gTrees[0].GetEntries(select)
+    assert_equal(h.GetEntries(), n_selected)
+    assert_equal(gSelections.get(gTrees[0], select).GetN(), n_selected)
+    assert_equal(gSelections.get(gTrees[0], 'gauss_leaf > 0'), None)
+    assert_equal(gSelections.get(gTrees[0], 'gauss_leaf > 0').GetN(),
+                 gTrees[0].GetEntries('gauss_leaf > 0'))
+    assert_equal(gSelections.get(gTrees[0], 'nr_leaf % 2 == 0', force=True).GetN(),
+                 gTrees[0].GetEntries('nr_leaf % 2 == 0'))
+    ### all parts known: intersect without reading the tree
+    reordered = 'gauss_leaf > 0 && nr_leaf % 2 == 0'
+    assert_equal(gSelections.get(gTrees[0], reordered).GetN(), n_selected)
+    assert_equal(gTrees[0].GetEntryList(), None)
+    gSelections.enabled = False
+    assert_equal(gSelections.get(gTrees[0], 'gauss_leaf < 0', force=True), None)
+    gSelections.enabled = True
+    ### trees in memory are not cached
+    tree = _memory_tree('selection_tree', 20)
+    assert_equal(gSelections.get(tree, 'x > 5', force=True), None)
+
+def test_prepare_eval():
+    """ only whole identifiers are prefixed, translations are reused """
+    from lookat.evallib import prepare_eval
+    from lookat.snapshot import _Column
+    class FakeTree(object):
+        def GetListOfBranches(self):
+            return [_Column('pt'), _Column('pt_err'), _Column('e')]
+    tree = FakeTree()
+    expr = prepare_eval('pt*1e3:pt_err/pt + e', tree)
+    assert_equal(expr.source, 'evt.pt*1e3:evt.pt_err/evt.pt + evt.e')
+    assert_equal(expr.branches, ['pt', 'pt_err', 'e'])
+    assert_equal(prepare_eval('pt*1e3:pt_err/pt + e', tree) is expr, True)
+
+def test_tmath_namespace():
+    """ common TMath names map to numpy, others are added on request """
+    import numpy
+    from ROOT import TMath
+    from lookat.evallib import gTMath, add_tmath
+    assert_equal(gTMath['Sqrt'](numpy.array([4.0, 9.0])).tolist(), [2.0, 3.0])
+    add_tmath('BreitWigner')
+    assert_equal(round(gTMath['BreitWigner'](numpy.array([0.0]))[0], 6),
+                 round(TMath.BreitWigner(0.0), 6))
+
+def test_iter_entries():
+    """ only selected entries are visited, nothing is added to gDirectory """
+    from lookat.treeloop import iter_entries
+    select = 'int_leaf % 3 == 0'
+    n_objects = gDirectory.GetList().GetSize()
+    values = [evt.int_leaf for evt in iter_entries(gTrees[1], select, ['int_leaf'])]
+    assert_equal(len(values), gTrees[1].GetEntries(select))
+    assert_equal(sorted(set(values)), [0, 3, 6, 9])
+    assert_equal(gDirectory.GetList().GetSize(), n_objects)
+    assert_equal(gTrees[1].GetEntryList(), None)
+    assert_raises(ValueError, iter_entries, gTrees[1], 'no_such_leaf > 0')
+
+def test_fill_corr_eval_blocks():
+    """ block-wise filling gives the same histogram as the per-event loop """
+    from lookat.evallib import fill_corr_eval, prepare_eval, get_1d
+    from lookat.treeloop import iter_entries
+    h_eff = TH1F("h_eff_blocks", "", 10, 0, 10)
+    for i in range(10):
+        h_eff.SetBinContent(i+1, 0.1*(i+1))
+    var, eff_var = 'int_leaf*double_leaf', 'int_leaf+0.5'
+    select = 'double_leaf > 0.15'
+    h_evt = TH1F("h_corr_evt", "", 20, 0, 10)
+    eval_var = prepare_eval(var, gTrees[1])
+    eval_eff = prepare_eval(eff_var, gTrees[1])
+    for evt in iter_entries(gTrees[1], select):
+        h_evt.Fill(eval_var(evt)[0], 1./get_1d(h_eff, eval_eff, evt))
+    h_blk = TH1F("h_corr_blk", "", 20, 0, 10)
+    fill_corr_eval(h_blk, var, h_eff, eff_var, gTrees[1], select)
+    assert_equal(h_blk.GetEntries(), h_evt.GetEntries())
+    for i in range(22):
+        assert_equal(round(h_blk.GetBinContent(i), 6), round(h_evt.GetBinContent(i), 6))
+        assert_equal(round(h_blk.GetBinError(i), 6), round(h_evt.GetBinError(i), 6))
+
+def test_fill_corr_eval_tefficiency():
+    """ efficiencies are taken from a TEfficiency, optionally interpolated """
+    from ROOT import TEfficiency
+    from lookat.evallib import fill_corr_eval
+    teff = TEfficiency("teff_test", "", 10, 0, 10)
+    for i in range(10):
+        teff.Fill(True, i+0.5)
+        teff.Fill(i % 2 == 0, i+0.5)
+    select = 'int_leaf >= 0 && int_leaf < 10'
+    n_selected = gTrees[1].GetEntries(select)
+    h_bin = TH1F("h_corr_bin", "", 10, 0, 10)
+    fill_corr_eval(h_bin, 'int_leaf', teff, 'int_leaf', gTrees[1], select)
+    n_even = gTrees[1].GetEntries(select+' && int_leaf % 2 == 0')
+    assert_equal(round(h_bin.GetSumOfWeights(), 6),
+                 round(n_even+2*(n_selected-n_even), 6))
+    h_int = TH1F("h_corr_int", "", 10, 0, 10)
+    fill_corr_eval(h_int, 'int_leaf+0.5', teff, 'int_leaf+0.5', gTrees[1],
+                   select, interpolate=True)
+    assert_equal(round(h_int.GetSumOfWeights(), 6),
+                 round(h_bin.GetSumOfWeights(), 6))
+    ### between the bin centers: (1+0.5)/2 = 0.75 for all events
+    import numpy
+    from lookat.columnar import get_lookup
+    assert_equal([round(v, 6) for v in get_lookup(teff).interpolate(numpy.array([1.0, 1.25, 7.0]))],
+                 [0.75, 0.625, 0.75])
+    select = 'int_leaf >= 0 && int_leaf < 9'
+    h_mid = TH1F("h_corr_mid", "", 10, 0, 10)
+    fill_corr_eval(h_mid, 'int_leaf', teff, 'int_leaf+1.0', gTrees[1],
+                   select, interpolate=True)
+    assert_equal(round(h_mid.GetSumOfWeights(), 6),
+                 round(gTrees[1].GetEntries(select)/0.75, 6))
+
+def test_lookup_3d():
+    """ 3D lookups find the same bins as FindFixBin, interpolation is trilinear """
+    import numpy
+    from ROOT import TH3F
+    from lookat.columnar import BinLookup
+    h3 = TH3F("h_lookup_3d", "", 2, 0, 2, 3, 0, 3, 4, 0, 4)
+    for i in range(1, 3):
+        for j in range(1, 4):
+            for k in range(1, 5):
+                h3.SetBinContent(i, j, k, 100*i+10*j+k)
+    lookup = BinLookup(h3)
+    x = numpy.array([0.2, 1.7, -1.0, 1.2])
+    y = numpy.array([2.5, 0.1, 1.5, 5.0])
+    z = numpy.array([3.9, 0.0, 2.2, 1.0])
+    expected = [h3.GetBinContent(h3.FindFixBin(x[n], y[n], z[n])) for n in range(len(x))]
+    assert_equal(lookup(x, y, z).tolist(), expected)
+    ### content is linear in the bin centers: 100*(x+0.5)+10*(y+0.5)+(z+0.5)
+    values = lookup.interpolate(numpy.array([0.75, 1.0]), numpy.array([1.25, 2.0]),
+                                numpy.array([2.0, 0.8]))
+    assert_equal([round(v, 6) for v in values], [145.0, 176.3])
+
+def test_bulk_filler():
+    """ buffered filling gives the same contents and errors as Fill() """
+    from lookat.columnar import BulkFiller
+    h_ref = TH1F("h_bulk_ref", "", 10, 0, 10)
+    h_bulk = TH1F("h_bulk", "", 10, 0, 10)
+    with BulkFiller(h_bulk, buffer_size=7) as filler:
+        for i in range(50):
+            h_ref.Fill(i % 12 - 1, 0.1*i)
+            filler.fill(i % 12 - 1, 0.1*i)
+    assert_equal(h_bulk.GetEntries(), h_ref.GetEntries())
+    for i in range(12):
+        assert_equal(round(h_bulk.GetBinContent(i), 6), round(h_ref.GetBinContent(i), 6))
+        assert_equal(round(h_bulk.GetBinError(i), 6), round(h_ref.GetBinError(i), 6))